@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк сериализации больших ответов /posts и /companies.
+
+Сравнивает три пути для одной и той же страницы (по умолчанию 10 000 строк):
+  - dict + jsonable_encoder + json.dumps — как FastAPI отдаёт ответ без response_model;
+  - dict + jsonable_encoder + orjson     — то же с ORJSONResponse (если установлен orjson);
+  - response_model (Pydantic)            — проверка модели и запись сразу в JSON-байты,
+                                           как сейчас отдают /posts и /companies.
+
+Usage:
+  python bench_serialization.py [--rows 10000] [--repeat 5]
+"""
+
+import argparse
+import json
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from register import CompanyPage, PostPage
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _posts_payload(rows: int) -> dict:
+    started = datetime(2025, 1, 1)
+    return {
+        'items': [
+            {
+                'id': i,
+                'user_id': i % 500 + 1,
+                'company_id': i % 50 + 1 if i % 3 else None,
+                'content': f'Пост номер {i}: ищем сооснователя в команду, пишите в личные сообщения',
+                'image_url': None,
+                'likes_count': i % 97,
+                'comments_count': i % 13,
+                'liked_by_me': i % 5 == 0,
+                'created_at': started + timedelta(minutes=i),
+            }
+            for i in range(rows)
+        ],
+        'next_cursor': 'eyJ2IjpbIjIwMjUtMDEtMDFUMDA6MDA6MDAiLDFdfQ',
+    }
+
+
+def _companies_payload(rows: int) -> dict:
+    started = datetime(2025, 1, 1)
+    return {
+        'items': [
+            {
+                'id': i,
+                'name': f'Компания {i}',
+                'description': 'Разрабатываем сервисы для малого бизнеса и ищем партнёров',
+                'industry': ('IT', 'Финтех', 'Ритейл', 'Логистика')[i % 4],
+                'location': ('Москва', 'Санкт-Петербург', 'Казань')[i % 3],
+                'logo_url': f'assets/images/logos/company_{i}.png',
+                'employee_count': i % 1000,
+                'contact_email': f'info{i}@example.ru',
+                'created_at': started + timedelta(hours=i),
+            }
+            for i in range(rows)
+        ],
+        'next_cursor': None,
+    }
+
+
+def _json_default(payload):
+    return json.dumps(
+        jsonable_encoder(payload), ensure_ascii=False, allow_nan=False, indent=None, separators=(',', ':')
+    ).encode('utf-8')
+
+
+def _orjson_default(payload):
+    return orjson.dumps(jsonable_encoder(payload), option=orjson.OPT_NON_STR_KEYS)
+
+
+def _response_model(adapter: TypeAdapter, exclude_unset: bool):
+    def serialize(payload):
+        return adapter.dump_json(adapter.validate_python(payload), exclude_unset=exclude_unset)
+    return serialize
+
+
+def _measure(fn, payload, repeat: int):
+    fn(payload)  # прогрев
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = fn(payload)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000, len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    # exclude_unset — как в декораторах эндпоинтов (у /posts поля expand необязательны)
+    for name, payload, model, exclude_unset in (
+        ('/posts', _posts_payload(args.rows), PostPage, True),
+        ('/companies', _companies_payload(args.rows), CompanyPage, False),
+    ):
+        print(f'== {name}: {args.rows} строк')
+        paths = [('jsonable_encoder + json', _json_default)]
+        if orjson is not None:
+            paths.append(('jsonable_encoder + orjson', _orjson_default))
+        paths.append(('response_model', _response_model(TypeAdapter(model), exclude_unset)))
+
+        baseline = None
+        for label, fn in paths:
+            ms, size = _measure(fn, payload, args.repeat)
+            baseline = baseline or ms
+            print(f'  {label:26}: {ms:8.1f} мс  ({baseline / ms:4.1f}x)  {size / 1024:8.0f} КБ')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк конкурентного чтения/записи SQLite для профилей PRAGMA из register.py.
+
+Писатели имитируют лайки и комментарии (INSERT + UPDATE счётчика поста),
+читатели — открытие ленты (первая страница постов). Для каждого профиля
+печатаются пропускная способность, задержки и число ошибок "database is locked".
+
+Usage:
+  python bench_sqlite.py [--seconds 5] [--writers 4] [--readers 8] [--posts 2000]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine, event, insert, select, update
+from sqlalchemy.exc import OperationalError
+
+from register import Base, Comment, Like, Post, SQLITE_PROFILES, apply_sqlite_pragmas
+
+
+def _make_engine(path: str, profile: str):
+    engine = create_engine(f'sqlite:///{path}', pool_size=32, max_overflow=0)
+    pragmas = SQLITE_PROFILES[profile]
+
+    @event.listens_for(engine, 'connect')
+    def _on_connect(dbapi_connection, connection_record):
+        apply_sqlite_pragmas(dbapi_connection, pragmas)
+
+    return engine
+
+
+def _seed(engine, posts: int):
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(Post), [
+            {'user_id': 1, 'content': f'Пост {i}', 'likes_count': 0, 'comments_count': 0}
+            for i in range(posts)
+        ])
+
+
+def _worker(engine, stop: threading.Event, op, stats: dict, lock: threading.Lock):
+    latencies, errors = [], 0
+    while not stop.is_set():
+        started = time.perf_counter()
+        try:
+            op(engine)
+            latencies.append(time.perf_counter() - started)
+        except OperationalError:
+            errors += 1
+    with lock:
+        stats['latencies'].extend(latencies)
+        stats['errors'] += errors
+
+
+def _write(engine, posts: int):
+    post_id = random.randint(1, posts)
+    user_id = random.randint(1, 1_000_000)
+    with engine.begin() as conn:
+        if random.random() < 0.7:
+            conn.execute(insert(Like).values(post_id=post_id, user_id=user_id))
+            conn.execute(update(Post).where(Post.id == post_id).values(likes_count=Post.likes_count + 1))
+        else:
+            conn.execute(insert(Comment).values(post_id=post_id, user_id=user_id, content='Отличная новость!'))
+            conn.execute(update(Post).where(Post.id == post_id).values(comments_count=Post.comments_count + 1))
+
+
+def _read(engine, posts: int):
+    with engine.connect() as conn:
+        conn.execute(
+            select(Post).order_by(Post.created_at.desc(), Post.id.desc()).limit(20)
+        ).all()
+
+
+def run_profile(profile: str, args) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = _make_engine(os.path.join(tmp, 'bench.db'), profile)
+        _seed(engine, args.posts)
+
+        stop = threading.Event()
+        lock = threading.Lock()
+        results = {
+            'write': {'latencies': [], 'errors': 0},
+            'read': {'latencies': [], 'errors': 0},
+        }
+        threads = [
+            threading.Thread(target=_worker, args=(engine, stop, lambda e: _write(e, args.posts), results['write'], lock))
+            for _ in range(args.writers)
+        ] + [
+            threading.Thread(target=_worker, args=(engine, stop, lambda e: _read(e, args.posts), results['read'], lock))
+            for _ in range(args.readers)
+        ]
+        for thread in threads:
+            thread.start()
+        time.sleep(args.seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        engine.dispose()
+    return results
+
+
+def _report(profile: str, results: dict, seconds: float):
+    print(f'== {profile}: {SQLITE_PROFILES[profile] or "настройки SQLite по умолчанию"}')
+    for kind in ('write', 'read'):
+        latencies = sorted(results[kind]['latencies'])
+        if latencies:
+            p50 = statistics.median(latencies) * 1000
+            p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+        else:
+            p50 = p99 = 0.0
+        print(
+            f'  {kind:5}: {len(latencies) / seconds:9.1f} оп/с'
+            f'  p50 {p50:7.2f} мс  p99 {p99:8.2f} мс'
+            f'  locked: {results[kind]["errors"]}'
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--posts', type=int, default=2000)
+    parser.add_argument('--profiles', nargs='+', default=list(SQLITE_PROFILES))
+    args = parser.parse_args()
+
+    for profile in args.profiles:
+        _report(profile, run_profile(profile, args), args.seconds)
+
+
+if __name__ == '__main__':
+    main()
@@ -48,6 +48,22 @@ class Company {
     );
   }
 
+  // Сводка компании, вложенная в пост ленты (expand=company): без описания и контактов
+  factory Company.fromSummary(Map<String, dynamic> json) {
+    return Company(
+      id: json['id'] as int,
+      name: json['name'] as String? ?? '',
+      description: '',
+      industry: json['industry'] as String? ?? '',
+      location: json['location'] as String? ?? '',
+      logoUrl: json['logo_url'] as String?,
+      employeeCount: null,
+      contactEmail: '',
+      createdBy: null,
+      createdAt: DateTime.fromMillisecondsSinceEpoch(0),
+    );
+  }
+
   Map<String, dynamic> toJson() {
     return {
       'id': id,
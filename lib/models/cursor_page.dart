@@ -0,0 +1,20 @@
+// Страница выдачи с курсором: сервер отдаёт {items, next_cursor}, nextCursor == null — дальше пусто
+class CursorPage<T> {
+  final List<T> items;
+  final String? nextCursor;
+
+  CursorPage({
+    required this.items,
+    this.nextCursor,
+  });
+
+  bool get hasMore => nextCursor != null;
+
+  factory CursorPage.fromJson(Map<String, dynamic> json, T Function(Map<String, dynamic>) fromJson) {
+    final List<dynamic> data = json['items'];
+    return CursorPage(
+      items: data.map((item) => fromJson(item)).toList(),
+      nextCursor: json['next_cursor'],
+    );
+  }
+}
\ No newline at end of file
@@ -3,4 +3,5 @@ export 'company.dart';
 export 'post.dart';
 export 'comment.dart';
 export 'subscription.dart';
-export 'business_card.dart'; 
\ No newline at end of file
+export 'business_card.dart'; 
+export 'cursor_page.dart';
\ No newline at end of file
@@ -1,3 +1,6 @@
+import 'company.dart';
+import 'user.dart';
+
 class Post {
   final int id;
   final int userId;
@@ -7,6 +10,11 @@ class Post {
   final int likesCount;
   final int commentsCount;
   final DateTime createdAt;
+  // Лайкнул ли пост текущий пользователь: сервер отмечает при viewer_id, в локальную БД не пишется
+  final bool likedByMe;
+  // Только при expand=author,company: автор и компания приходят вместе с постом
+  final User? author;
+  final Company? company;
 
   Post({
     required this.id,
@@ -17,6 +25,9 @@ class Post {
     required this.likesCount,
     required this.commentsCount,
     required this.createdAt,
+    this.likedByMe = false,
+    this.author,
+    this.company,
   });
 
   factory Post.fromJson(Map<String, dynamic> json) {
@@ -29,6 +40,9 @@ class Post {
       likesCount: json['likes_count'],
       commentsCount: json['comments_count'],
       createdAt: DateTime.parse(json['created_at']),
+      likedByMe: json['liked_by_me'] ?? false,
+      author: json['author'] != null ? User.fromSummary(json['author']) : null,
+      company: json['company'] != null ? Company.fromSummary(json['company']) : null,
     );
   }
 
@@ -54,6 +68,7 @@ class Post {
     int? likesCount,
     int? commentsCount,
     DateTime? createdAt,
+    bool? likedByMe,
   }) {
     return Post(
       id: id ?? this.id,
@@ -64,6 +79,9 @@ class Post {
       likesCount: likesCount ?? this.likesCount,
       commentsCount: commentsCount ?? this.commentsCount,
       createdAt: createdAt ?? this.createdAt,
+      likedByMe: likedByMe ?? this.likedByMe,
+      author: this.author,
+      company: this.company,
     );
   }
 } 
\ No newline at end of file
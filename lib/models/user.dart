@@ -32,6 +32,19 @@ class User {
     );
   }
 
+  // Сводка автора, вложенная в пост ленты (expand=author): без email и даты регистрации
+  factory User.fromSummary(Map<String, dynamic> json) {
+    return User(
+      id: json['id'],
+      email: '',
+      name: json['name'],
+      position: json['position'],
+      companyName: json['company_name'],
+      avatarUrl: json['avatar_url'],
+      createdAt: DateTime.fromMillisecondsSinceEpoch(0),
+    );
+  }
+
   Map<String, dynamic> toJson() {
     return {
       'id': id,
@@ -1,4 +1,5 @@
 import '../models/company.dart';
+import '../models/cursor_page.dart';
 import '../services/company_service.dart';
 
 class CompanyRepository {
@@ -6,8 +7,26 @@ class CompanyRepository {
 
   // ==================== ОСНОВНЫЕ ОПЕРАЦИИ ====================
 
-  Future<List<Company>> getCompanies() async {
-    return await _companyService.getCompanies();
+  Future<List<Company>> getCompanies({
+    String? industry,
+    String? location,
+    String? query,
+  }) async {
+    return await _companyService.getCompanies(industry: industry, location: location, query: query);
+  }
+
+  Future<CursorPage<Company>> getCompaniesPage({
+    String? industry,
+    String? location,
+    String? query,
+    String? cursor,
+  }) async {
+    return await _companyService.getCompaniesPage(
+      industry: industry,
+      location: location,
+      query: query,
+      cursor: cursor,
+    );
   }
 
   Future<Company?> getCompany(int id) async {
@@ -1,5 +1,6 @@
 import '../models/post.dart';
 import '../models/comment.dart';
+import '../models/cursor_page.dart';
 import '../services/post_service.dart';
 
 class PostRepository {
@@ -11,6 +12,14 @@ class PostRepository {
     return await _postService.getPosts();
   }
 
+  Future<CursorPage<Post>> getPostsPage({
+    int? viewerId,
+    String? cursor,
+    List<String> expand = const [],
+  }) async {
+    return await _postService.getPostsPage(viewerId: viewerId, cursor: cursor, expand: expand);
+  }
+
   Future<Post?> getPost(int id) async {
     return await _postService.getLocalPost(id);
   }
@@ -45,6 +54,10 @@ class PostRepository {
     return await _postService.getCommentsForPost(postId);
   }
 
+  Future<CursorPage<Comment>> getCommentsPage(int postId, {String? cursor}) async {
+    return await _postService.getCommentsPage(postId, cursor: cursor);
+  }
+
   Future<bool> likePost(int postId, int userId) async {
     return await _postService.likePost(postId, userId);
   }
@@ -24,6 +24,13 @@ class _CompaniesScreenState extends State<CompaniesScreen> {
   List<Company> _favoriteCompanies = [];
   bool _isLoading = true;
   String? _error;
+
+  // Постраничная загрузка: курсор следующей страницы, null — страниц больше нет
+  final ScrollController _scrollController = ScrollController();
+  String? _nextCursor;
+  bool _isLoadingMore = false;
+  // Номер текущей выборки: ответы, пришедшие после смены фильтров, отбрасываются
+  int _loadGeneration = 0;
   
   // Фильтры
   Map<String, dynamic>? _currentFilters;
@@ -31,9 +38,22 @@ class _CompaniesScreenState extends State<CompaniesScreen> {
   @override
   void initState() {
     super.initState();
+    _scrollController.addListener(_onScroll);
     _loadCompanies();
   }
 
+  @override
+  void dispose() {
+    _scrollController.dispose();
+    super.dispose();
+  }
+
+  void _onScroll() {
+    if (_scrollController.position.extentAfter < 500) {
+      _loadMore();
+    }
+  }
+
   @override
   void didChangeDependencies() {
     super.didChangeDependencies();
@@ -41,7 +61,19 @@ class _CompaniesScreenState extends State<CompaniesScreen> {
     _refreshFavorites();
   }
 
+  Future<CursorPage<Company>> _fetchPage(String? cursor) {
+    // Отрасль, город и поиск фильтрует сервер, чтобы выдача совпадала с его фасетами
+    final search = _currentFilters?['search']?.toString();
+    return CompanyRepository().getCompaniesPage(
+      industry: _currentFilters?['industry'],
+      location: _currentFilters?['location'],
+      query: search != null && search.isNotEmpty ? search : null,
+      cursor: cursor,
+    );
+  }
+
   Future<void> _loadCompanies() async {
+    final generation = ++_loadGeneration;
     try {
       if (mounted) {
         setState(() {
@@ -50,7 +82,7 @@ class _CompaniesScreenState extends State<CompaniesScreen> {
         });
       }
 
-      final companies = await CompanyRepository().getCompanies();
+      final page = await _fetchPage(null);
       
       // Загружаем избранные компании
       final userId = await SessionService.getCurrentUserId();
@@ -59,16 +91,18 @@ class _CompaniesScreenState extends State<CompaniesScreen> {
         favorites = await CompanyService().getFavoriteCompanies(userId);
       }
       
-      if (mounted) {
+      if (mounted && generation == _loadGeneration) {
         setState(() {
-          _companies = companies;
-          _filteredCompanies = companies;
+          _companies = page.items;
+          _filteredCompanies = _filterByEmployeeCount(page.items);
+          _nextCursor = page.nextCursor;
+          _isLoadingMore = false;
           _favoriteCompanies = favorites;
           _isLoading = false;
         });
       }
     } catch (e) {
-      if (mounted) {
+      if (mounted && generation == _loadGeneration) {
         setState(() {
           _error = 'Ошибка загрузки компаний: $e';
           _isLoading = false;
@@ -77,85 +111,67 @@ class _CompaniesScreenState extends State<CompaniesScreen> {
     }
   }
 
-  Future<void> _applyFilters(Map<String, dynamic>? filters) async {
-    if (filters == null) {
-      // Сброс фильтров
-      if (mounted) {
-        setState(() {
-          _filteredCompanies = _companies;
-          _currentFilters = null;
-        });
-      }
-      return;
-    }
-
-    if (mounted) {
-      setState(() {
-        _currentFilters = filters;
-      });
-    }
+  Future<void> _loadMore() async {
+    if (_isLoading || _isLoadingMore || _nextCursor == null) return;
+    final generation = _loadGeneration;
+    setState(() {
+      _isLoadingMore = true;
+    });
 
     try {
-      List<Company> filtered = _companies;
-
-      // Поиск по тексту
-      final searchQuery = filters['search'];
-      if (searchQuery != null && searchQuery.toString().isNotEmpty) {
-        final searchResults = await CompanyRepository().searchCompanies(searchQuery);
-        filtered = filtered.where((company) => 
-          searchResults.any((result) => result.id == company.id)
-        ).toList();
-      }
-
-      // Фильтр по индустрии
-      if (filters['industry'] != null) {
-        filtered = filtered.where((company) => 
-          company.industry == filters['industry']
-        ).toList();
-      }
-
-      // Фильтр по локации
-      if (filters['location'] != null) {
-        filtered = filtered.where((company) => 
-          company.location == filters['location']
-        ).toList();
-      }
-
-      // Фильтр по количеству сотрудников
-      if (filters['employeeCount'] != null) {
-        filtered = filtered.where((company) {
-          final employeeCount = company.employeeCount ?? 0;
-          switch (filters['employeeCount']) {
-            case '1-10':
-              return employeeCount >= 1 && employeeCount <= 10;
-            case '11-50':
-              return employeeCount >= 11 && employeeCount <= 50;
-            case '51-200':
-              return employeeCount >= 51 && employeeCount <= 200;
-            case '201-1000':
-              return employeeCount >= 201 && employeeCount <= 1000;
-            case '1000+':
-              return employeeCount > 1000;
-            default:
-              return true;
-          }
-        }).toList();
-      }
-
-      if (mounted) {
+      final page = await _fetchPage(_nextCursor);
+      if (mounted && generation == _loadGeneration) {
         setState(() {
-          _filteredCompanies = filtered;
+          _companies = [..._companies, ...page.items];
+          _filteredCompanies = _filterByEmployeeCount(_companies);
+          _nextCursor = page.nextCursor;
+          _isLoadingMore = false;
         });
       }
     } catch (e) {
-      if (mounted) {
+      if (mounted && generation == _loadGeneration) {
+        setState(() {
+          _isLoadingMore = false;
+        });
         ScaffoldMessenger.of(context).showSnackBar(
-        SnackBar(content: Text('Ошибка применения фильтров: $e')),
-      );
+          SnackBar(content: Text('Ошибка загрузки компаний: $e')),
+        );
       }
     }
   }
 
+  List<Company> _filterByEmployeeCount(List<Company> companies) {
+    // Размер компании сервер не фильтрует: отбираем среди уже загруженных страниц
+    final range = _currentFilters?['employeeCount'];
+    if (range == null) return companies;
+    return companies.where((company) {
+      final employeeCount = company.employeeCount ?? 0;
+      switch (range) {
+        case '1-10':
+          return employeeCount >= 1 && employeeCount <= 10;
+        case '11-50':
+          return employeeCount >= 11 && employeeCount <= 50;
+        case '51-200':
+          return employeeCount >= 51 && employeeCount <= 200;
+        case '201-1000':
+          return employeeCount >= 201 && employeeCount <= 1000;
+        case '1000+':
+          return employeeCount > 1000;
+        default:
+          return true;
+      }
+    }).toList();
+  }
+
+  Future<void> _applyFilters(Map<String, dynamic>? filters) async {
+    // null — сброс фильтров; в обоих случаях выдача запрашивается у сервера заново
+    _currentFilters = filters;
+    if (_scrollController.hasClients) {
+      _scrollController.jumpTo(0);
+    }
+    await _loadCompanies();
+  }
+
   void _openFilters() async {
     final result = await Navigator.push(
       context,
@@ -297,7 +313,7 @@ class _CompaniesScreenState extends State<CompaniesScreen> {
   }
 
   Widget _buildCompaniesList() {
-    if (_filteredCompanies.isEmpty) {
+    if (_filteredCompanies.isEmpty && _nextCursor == null) {
       return Center(
         child: Column(
           mainAxisAlignment: MainAxisAlignment.center,
@@ -331,9 +347,13 @@ class _CompaniesScreenState extends State<CompaniesScreen> {
     }
 
     return ListView.builder(
+      controller: _scrollController,
       padding: const EdgeInsets.all(16),
-      itemCount: _filteredCompanies.length,
+      itemCount: _filteredCompanies.length + (_nextCursor != null ? 1 : 0),
       itemBuilder: (context, index) {
+        if (index == _filteredCompanies.length) {
+          return _buildLoadMoreFooter();
+        }
         final company = _filteredCompanies[index];
         return Card(
           elevation: 4,
@@ -398,6 +418,21 @@ class _CompaniesScreenState extends State<CompaniesScreen> {
     );
   }
 
+  Widget _buildLoadMoreFooter() {
+    // Кнопка нужна, когда отфильтрованная страница не заполняет экран и прокрутки нет
+    return Padding(
+      padding: const EdgeInsets.symmetric(vertical: 16),
+      child: Center(
+        child: _isLoadingMore
+            ? const CircularProgressIndicator()
+            : TextButton(
+                onPressed: _loadMore,
+                child: const Text('Показать ещё'),
+              ),
+      ),
+    );
+  }
+
   Future<void> _refreshFavorites() async {
     try {
       final userId = await SessionService.getCurrentUserId();
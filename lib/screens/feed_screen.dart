@@ -19,61 +19,54 @@ class FeedScreen extends StatefulWidget {
 
 class _FeedScreenState extends State<FeedScreen> {
   final PostRepository _postRepository = PostRepository();
-  final UserRepository _userRepository = UserRepository();
-  final CompanyRepository _companyRepository = CompanyRepository();
+  // Автор и компания приходят вместе с постом, отдельных запросов на карточку нет
+  static const _expand = ['author', 'company'];
   
   List<Post> _posts = [];
   Map<int, User> _authors = {};
   Map<int, Company> _companies = {};
   Map<int, bool> _likedPosts = {};
   bool _isLoading = true;
+  // Текущий пользователь: по нему сервер отмечает liked_by_me
+  int? _viewerId;
+
+  // Постраничная загрузка ленты: курсор следующей страницы, null — постов больше нет
+  final ScrollController _scrollController = ScrollController();
+  String? _nextCursor;
+  bool _isLoadingMore = false;
 
   @override
   void initState() {
     super.initState();
+    _scrollController.addListener(_onScroll);
     _loadPosts();
   }
 
+  @override
+  void dispose() {
+    _scrollController.dispose();
+    super.dispose();
+  }
+
+  void _onScroll() {
+    if (_scrollController.position.extentAfter < 500) {
+      _loadMore();
+    }
+  }
+
   Future<void> _loadPosts() async {
     try {
-      final posts = await _postRepository.getPosts();
+      _viewerId = await SessionService.getCurrentUserId();
+      final page = await _postRepository.getPostsPage(viewerId: _viewerId, expand: _expand);
       if (mounted) {
         setState(() {
-          _posts = posts;
+          _posts = page.items;
+          _nextCursor = page.nextCursor;
+          _likedPosts = {};
+          _rememberPostDetails(page.items);
           _isLoading = false;
         });
       }
-      
-      // Загружаем данные авторов и компаний
-      for (final post in posts) {
-        if (!mounted) break; // Прерываем цикл если виджет удален
-        
-        if (post.userId != null) {
-          try {
-            final author = await _userRepository.getUser(post.userId!);
-            if (author != null && mounted) {
-              setState(() {
-                _authors[post.userId!] = author;
-              });
-            }
-          } catch (e) {
-            print('Ошибка загрузки автора: $e');
-          }
-        }
-        
-        if (post.companyId != null) {
-          try {
-            final company = await _companyRepository.getCompany(post.companyId!);
-            if (company != null && mounted) {
-              setState(() {
-                _companies[post.companyId!] = company;
-              });
-            }
-          } catch (e) {
-            print('Ошибка загрузки компании: $e');
-          }
-        }
-      }
     } catch (e) {
       print('Ошибка загрузки постов: $e');
       if (mounted) {
@@ -84,10 +77,58 @@ class _FeedScreenState extends State<FeedScreen> {
     }
   }
 
+  Future<void> _loadMore() async {
+    if (_isLoading || _isLoadingMore || _nextCursor == null) return;
+    setState(() {
+      _isLoadingMore = true;
+    });
+
+    try {
+      final page = await _postRepository.getPostsPage(
+        viewerId: _viewerId,
+        cursor: _nextCursor,
+        expand: _expand,
+      );
+      if (mounted) {
+        setState(() {
+          _posts = [..._posts, ...page.items];
+          _rememberPostDetails(page.items);
+          _nextCursor = page.nextCursor;
+          _isLoadingMore = false;
+        });
+      }
+    } catch (e) {
+      print('Ошибка загрузки постов: $e');
+      if (mounted) {
+        setState(() {
+          _isLoadingMore = false;
+        });
+      }
+    }
+  }
+
+  void _rememberPostDetails(List<Post> posts) {
+    for (final post in posts) {
+      _likedPosts[post.id] = post.likedByMe;
+      if (post.author != null) {
+        _authors[post.userId] = post.author!;
+      }
+      if (post.companyId != null && post.company != null) {
+        _companies[post.companyId!] = post.company!;
+      }
+    }
+  }
+
   Future<void> _handleLike(int index) async {
     final post = _posts[index];
     final isLiked = _likedPosts[post.id] ?? false;
-    const currentUserId = 1; // TODO: Получить ID текущего пользователя
+    final currentUserId = _viewerId;
+    if (currentUserId == null) {
+      ScaffoldMessenger.of(context).showSnackBar(
+        const SnackBar(content: Text('Необходимо войти в систему')),
+      );
+      return;
+    }
     
     try {
       if (isLiked) {
@@ -209,9 +250,13 @@ class _FeedScreenState extends State<FeedScreen> {
       body: _isLoading
           ? const Center(child: CircularProgressIndicator())
           : ListView.builder(
+              controller: _scrollController,
               padding: const EdgeInsets.all(16),
-              itemCount: _posts.length,
+              itemCount: _posts.length + (_nextCursor != null ? 1 : 0),
               itemBuilder: (context, index) {
+                if (index == _posts.length) {
+                  return _buildLoadMoreFooter();
+                }
                 final post = _posts[index];
                 final author = _authors[post.userId];
                 final company = post.companyId != null ? _companies[post.companyId] : null;
@@ -378,6 +423,20 @@ class _FeedScreenState extends State<FeedScreen> {
     );
   }
 
+  Widget _buildLoadMoreFooter() {
+    return Padding(
+      padding: const EdgeInsets.symmetric(vertical: 16),
+      child: Center(
+        child: _isLoadingMore
+            ? const CircularProgressIndicator()
+            : TextButton(
+                onPressed: _loadMore,
+                child: const Text('Показать ещё'),
+              ),
+      ),
+    );
+  }
+
   String _formatTimestamp(DateTime timestamp) {
     final now = DateTime.now();
     final difference = now.difference(timestamp);
@@ -32,6 +32,9 @@ class _PostDetailScreenState extends State<PostDetailScreen> {
   Map<int, User> _commentAuthors = {};
   bool _isLoadingComments = true;
   bool _isSubmittingComment = false;
+  // Курсор следующей страницы комментариев (сервер отдаёт новые первыми)
+  String? _commentsCursor;
+  bool _isLoadingMoreComments = false;
 
   @override
   void initState() {
@@ -49,24 +52,14 @@ class _PostDetailScreenState extends State<PostDetailScreen> {
         });
       }
 
-      final comments = await _postRepository.getCommentsForPost(widget.post.id);
-      
-      // Загружаем данные авторов комментариев
-      for (final comment in comments) {
-        try {
-          final author = await _userRepository.getUser(comment.userId);
-          if (author != null && mounted) {
-            _commentAuthors[comment.userId] = author;
-          }
-        } catch (e) {
-          print('Ошибка загрузки автора комментария: $e');
-        }
-      }
+      final page = await _postRepository.getCommentsPage(widget.post.id);
+      await _loadCommentAuthors(page.items);
 
       if (mounted) {
         setState(() {
           _comments.clear();
-          _comments.addAll(comments);
+          _comments.addAll(page.items);
+          _commentsCursor = page.nextCursor;
           _isLoadingComments = false;
         });
       }
@@ -80,6 +73,48 @@ class _PostDetailScreenState extends State<PostDetailScreen> {
     }
   }
 
+  Future<void> _loadMoreComments() async {
+    if (_isLoadingMoreComments || _commentsCursor == null) return;
+    setState(() {
+      _isLoadingMoreComments = true;
+    });
+
+    try {
+      final page = await _postRepository.getCommentsPage(widget.post.id, cursor: _commentsCursor);
+      await _loadCommentAuthors(page.items);
+
+      if (mounted) {
+        setState(() {
+          _comments.addAll(page.items);
+          _commentsCursor = page.nextCursor;
+          _isLoadingMoreComments = false;
+        });
+      }
+    } catch (e) {
+      print('Ошибка загрузки комментариев: $e');
+      if (mounted) {
+        setState(() {
+          _isLoadingMoreComments = false;
+        });
+      }
+    }
+  }
+
+  Future<void> _loadCommentAuthors(List<Comment> comments) async {
+    // Загружаем данные авторов комментариев
+    for (final comment in comments) {
+      if (_commentAuthors.containsKey(comment.userId)) continue;
+      try {
+        final author = await _userRepository.getUser(comment.userId);
+        if (author != null && mounted) {
+          _commentAuthors[comment.userId] = author;
+        }
+      } catch (e) {
+        print('Ошибка загрузки автора комментария: $e');
+      }
+    }
+  }
+
   Future<void> _checkLikeStatus() async {
     try {
       final userId = await SessionService.getCurrentUserId();
@@ -391,6 +426,18 @@ class _PostDetailScreenState extends State<PostDetailScreen> {
               ),
               const SizedBox(height: 12),
               ..._comments.map((comment) => _buildCommentCard(comment)),
+              if (_commentsCursor != null)
+                Center(
+                  child: _isLoadingMoreComments
+                      ? const Padding(
+                          padding: EdgeInsets.all(16.0),
+                          child: CircularProgressIndicator(),
+                        )
+                      : TextButton(
+                          onPressed: _loadMoreComments,
+                          child: const Text('Показать ещё комментарии'),
+                        ),
+                ),
             ] else ...[
               Center(
                 child: Padding(
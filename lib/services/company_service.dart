@@ -1,12 +1,22 @@
 import 'package:dio/dio.dart';
 import '../models/company.dart';
+import '../models/cursor_page.dart';
 import 'database_helper.dart';
 
 class CompanyService {
+  // Один экземпляр на приложение: ETag страниц каталога переживают пересоздание экранов и репозиториев
+  static final CompanyService _instance = CompanyService._internal();
+  factory CompanyService() => _instance;
+  CompanyService._internal();
+
   final DatabaseHelper _databaseHelper = DatabaseHelper();
   final Dio _dio = Dio();
   final String _baseUrl = 'http://62.113.37.96:8000';
 
+  // ETag последних загруженных страниц каталога: если они не изменились, сервер ответит 304 без тела
+  final Map<String, String> _pageEtags = {};
+  final Map<String, CursorPage<Company>> _pages = {};
+
   // ==================== ЛОКАЛЬНЫЕ ОПЕРАЦИИ ====================
 
   Future<List<Company>> getLocalCompanies() async {
@@ -27,27 +37,94 @@ class CompanyService {
 
   // ==================== СЕТЕВЫЕ ОПЕРАЦИИ ====================
 
-  Future<List<Company>> getCompanies() async {
+  Future<CursorPage<Company>> getCompaniesPage({
+    String? industry,
+    String? location,
+    String? query,
+    String? cursor,
+    int limit = 50,
+  }) async {
     try {
-      final response = await _dio.get('$_baseUrl/companies');
+      // Фильтрация и пагинация выполняются на сервере
+      final queryParameters = {
+        'limit': limit,
+        if (industry != null) 'industry': industry,
+        if (location != null) 'location': location,
+        if (query != null && query.isNotEmpty) 'q': query,
+        if (cursor != null) 'cursor': cursor,
+      };
+      final pageKey = queryParameters.toString();
+      final etag = _pageEtags[pageKey];
+      final response = await _dio.get(
+        '$_baseUrl/companies',
+        queryParameters: queryParameters,
+        options: Options(
+          headers: {if (etag != null) 'If-None-Match': etag},
+          validateStatus: (status) => status != null && (status < 300 || status == 304),
+        ),
+      );
+
+      if (response.statusCode == 304 && _pages.containsKey(pageKey)) {
+        return _pages[pageKey]!;
+      }
 
       if (response.statusCode == 200) {
-        final List<dynamic> companiesData = response.data;
-        final List<Company> companies = companiesData.map((json) => Company.fromJson(json)).toList();
+        final page = CursorPage.fromJson(response.data, Company.fromJson);
+
+        final newEtag = response.headers.value('etag');
+        if (newEtag != null) {
+          _pageEtags[pageKey] = newEtag;
+          _pages[pageKey] = page;
+        }
 
         // Сохраняем компании локально
-        for (final company in companies) {
+        for (final company in page.items) {
           await saveCompanyLocally(company);
         }
 
-        return companies;
+        return page;
       }
     } catch (e) {
       print('Ошибка получения компаний: $e');
-      // Возвращаем локальные данные
-      return await getLocalCompanies();
+      // Без сети отдаём локальные данные одной страницей
+      if (cursor == null) {
+        return CursorPage(items: await _filterLocal(industry: industry, location: location, query: query));
+      }
     }
-    return [];
+    return CursorPage(items: []);
+  }
+
+  Future<List<Company>> getCompanies({
+    String? industry,
+    String? location,
+    String? query,
+  }) async {
+    // Все страницы подряд по next_cursor; экранам удобнее getCompaniesPage
+    final companies = <Company>[];
+    String? cursor;
+    do {
+      final page = await getCompaniesPage(
+        industry: industry,
+        location: location,
+        query: query,
+        cursor: cursor,
+        limit: 100,
+      );
+      companies.addAll(page.items);
+      cursor = page.nextCursor;
+    } while (cursor != null);
+    return companies;
+  }
+
+  Future<List<Company>> _filterLocal({String? industry, String? location, String? query}) async {
+    var companies = query != null && query.isNotEmpty ? await searchCompanies(query) : await getLocalCompanies();
+    if (industry != null) {
+      companies = companies.where((company) => company.industry == industry).toList();
+    }
+    if (location != null) {
+      companies = companies.where((company) => company.location == location).toList();
+    }
+    return companies;
   }
 
   Future<Company?> createCompany({
@@ -194,13 +271,36 @@ class CompanyService {
     }).toList();
   }
 
+  Future<Map<String, dynamic>?> _getFacets() async {
+    try {
+      final response = await _dio.get('$_baseUrl/companies/facets');
+      if (response.statusCode == 200) {
+        return response.data;
+      }
+    } catch (e) {
+      print('Ошибка получения фильтров компаний: $e');
+    }
+    return null;
+  }
+
   Future<List<String>> getIndustries() async {
+    // Отрасли с количеством компаний считает сервер
+    final facets = await _getFacets();
+    if (facets != null) {
+      final List<dynamic> industries = facets['industries'];
+      return industries.map((item) => item['value'] as String).toList();
+    }
     final allCompanies = await getLocalCompanies();
     final industries = allCompanies.map((company) => company.industry).toSet().toList();
     return industries..sort();
   }
 
   Future<List<String>> getLocations() async {
+    final facets = await _getFacets();
+    if (facets != null) {
+      final List<dynamic> locations = facets['locations'];
+      return locations.map((item) => item['value'] as String).toList();
+    }
     final allCompanies = await getLocalCompanies();
     final locations = allCompanies.map((company) => company.location).toSet().toList();
     return locations..sort();
@@ -1,13 +1,23 @@
 import 'package:dio/dio.dart';
 import '../models/post.dart';
 import '../models/comment.dart';
+import '../models/cursor_page.dart';
 import 'database_helper.dart';
 
 class PostService {
+  // Один экземпляр на приложение: ETag страниц ленты переживают пересоздание экранов и репозиториев
+  static final PostService _instance = PostService._internal();
+  factory PostService() => _instance;
+  PostService._internal();
+
   final DatabaseHelper _databaseHelper = DatabaseHelper();
   final Dio _dio = Dio();
   final String _baseUrl = 'http://62.113.37.96:8000';
 
+  // ETag загруженных страниц ленты: если страница не изменилась, сервер ответит 304 без тела
+  final Map<String, String> _feedEtags = {};
+  final Map<String, CursorPage<Post>> _feedPages = {};
+
   // ==================== ЛОКАЛЬНЫЕ ОПЕРАЦИИ ====================
 
   Future<List<Post>> getLocalPosts() async {
@@ -48,27 +58,66 @@ class PostService {
 
   // ==================== СЕТЕВЫЕ ОПЕРАЦИИ ====================
 
-  Future<List<Post>> getPosts() async {
+  Future<CursorPage<Post>> getPostsPage({
+    int? viewerId,
+    String? cursor,
+    int limit = 20,
+    List<String> expand = const [],
+  }) async {
     try {
-      final response = await _dio.get('$_baseUrl/posts');
+      final queryParameters = {
+        'limit': limit,
+        // viewer_id — сервер отметит в каждом посте liked_by_me
+        if (viewerId != null) 'viewer_id': viewerId,
+        if (cursor != null) 'cursor': cursor,
+        // expand=author,company — автор и компания придут в том же ответе
+        if (expand.isNotEmpty) 'expand': expand.join(','),
+      };
+      final feedKey = queryParameters.toString();
+      final etag = _feedEtags[feedKey];
+      final response = await _dio.get(
+        '$_baseUrl/posts',
+        queryParameters: queryParameters,
+        options: Options(
+          headers: {if (etag != null) 'If-None-Match': etag},
+          validateStatus: (status) => status != null && (status < 300 || status == 304),
+        ),
+      );
+
+      if (response.statusCode == 304 && _feedPages.containsKey(feedKey)) {
+        return _feedPages[feedKey]!;
+      }
 
       if (response.statusCode == 200) {
-        final List<dynamic> postsData = response.data;
-        final List<Post> posts = postsData.map((json) => Post.fromJson(json)).toList();
+        // Сервер отдаёт страницу ленты: {items: [...], next_cursor: ...}
+        final page = CursorPage.fromJson(response.data, Post.fromJson);
+
+        final newEtag = response.headers.value('etag');
+        if (newEtag != null) {
+          _feedEtags[feedKey] = newEtag;
+          _feedPages[feedKey] = page;
+        }
 
         // Сохраняем посты локально
-        for (final post in posts) {
+        for (final post in page.items) {
           await savePostLocally(post);
         }
 
-        return posts;
+        return page;
       }
     } catch (e) {
       print('Ошибка получения постов: $e');
-      // Возвращаем локальные данные
-      return await getLocalPosts();
+      // Без сети отдаём локальные данные одной страницей
+      if (cursor == null) {
+        return CursorPage(items: await getLocalPosts());
+      }
     }
-    return [];
+    return CursorPage(items: []);
+  }
+
+  Future<List<Post>> getPosts({int? viewerId}) async {
+    // Первая страница ленты; следующие — getPostsPage с nextCursor
+    return (await getPostsPage(viewerId: viewerId)).items;
   }
 
   Future<Post?> createPost({
@@ -146,27 +195,47 @@ class PostService {
     return null;
   }
 
-  Future<List<Comment>> getCommentsForPost(int postId) async {
+  Future<CursorPage<Comment>> getCommentsPage(int postId, {String? cursor, int limit = 20}) async {
     try {
-      final response = await _dio.get('$_baseUrl/posts/$postId/comments');
+      final response = await _dio.get(
+        '$_baseUrl/posts/$postId/comments',
+        queryParameters: {
+          'limit': limit,
+          if (cursor != null) 'cursor': cursor,
+        },
+      );
 
       if (response.statusCode == 200) {
-        final List<dynamic> commentsData = response.data;
-        final List<Comment> comments = commentsData.map((json) => Comment.fromJson(json)).toList();
+        // Сервер отдаёт страницу комментариев, новые первыми: {items: [...], next_cursor: ...}
+        final page = CursorPage.fromJson(response.data, Comment.fromJson);
 
         // Сохраняем комментарии локально
-        for (final comment in comments) {
+        for (final comment in page.items) {
           await saveCommentLocally(comment);
         }
 
-        return comments;
+        return page;
       }
     } catch (e) {
       print('Ошибка получения комментариев: $e');
       // Возвращаем локальные данные
-      return await getLocalCommentsForPost(postId);
+      if (cursor == null) {
+        return CursorPage(items: await getLocalCommentsForPost(postId));
+      }
     }
-    return [];
+    return CursorPage(items: []);
+  }
+
+  Future<List<Comment>> getCommentsForPost(int postId) async {
+    // Все комментарии поста по next_cursor
+    final comments = <Comment>[];
+    String? cursor;
+    do {
+      final page = await getCommentsPage(postId, cursor: cursor, limit: 100);
+      comments.addAll(page.items);
+      cursor = page.nextCursor;
+    } while (cursor != null);
+    return comments;
   }
 
   Future<bool> likePost(int postId, int userId) async {
@@ -190,13 +259,21 @@ class PostService {
 
   Future<bool> unlikePost(int postId, int userId) async {
     try {
-      // Удаляем лайк локально
-      await unlikePostLocally(postId, userId);
-      return true;
+      final response = await _dio.delete(
+        '$_baseUrl/posts/$postId/like',
+        queryParameters: {'user_id': userId},
+      );
+
+      if (response.statusCode == 200) {
+        // Удаляем лайк локально
+        await unlikePostLocally(postId, userId);
+        return true;
+      }
     } catch (e) {
       print('Ошибка удаления лайка: $e');
       return false;
     }
+    return false;
   }
 
   // ==================== ДОПОЛНИТЕЛЬНЫЕ МЕТОДЫ ====================
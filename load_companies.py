@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Массовая загрузка компаний прямо в базу (DATABASE_URL, как у register.py).
+
+Источник читается потоком, поэтому память не зависит от его размера:
+  .json           — массив объектов (разбирается по одному объекту);
+  .ndjson/.jsonl  — объект JSON на строку (например, выгрузка /export/companies);
+  .csv            — строка заголовков с именами полей;
+  .py             — модуль со списком словарей (по умолчанию переменная companies,
+                    как в комапнии.py).
+Поля принимаются и в формате моделей (description, contact_email, logo_url),
+и в формате наборов данных (desc, email, logo). Логотипы сопоставляются
+с манифестом assets/logo (logo_manifest.py) по пути, домену или названию.
+
+Строки пишутся через модель Company: пакеты по --batch-size уходят одним
+executemany, вся загрузка — одна транзакция. Дубли по названию (name_key)
+пропускаются, так что повторный запуск ничего не удваивает; если добавлять
+нечего, транзакция откатывается. Версии data_versions и change_seq новых
+строк проставляются перед самым commit, чтобы не держать блокировку строки
+'changes', которую ждут все записи API.
+
+На SQLite вторичные индексы companies и триггер полнотекстового индекса на
+время загрузки снимаются и строятся заново одним проходом в той же
+транзакции; для небольших догрузок в большую таблицу их лучше оставить
+(--keep-indexes). На других СУБД индексы по умолчанию не трогаются:
+DROP INDEX берёт эксклюзивную блокировку companies, и с --drop-indexes
+каталог недоступен API до конца загрузки.
+Списки /companies увидят новые строки сразу (кэш привязан к их ETag),
+остальные кэши запущенного сервера догонят по TTL (RESPONSE_CACHE_TTL).
+
+Usage:
+  python load_companies.py SOURCE [--user-id 1] [--batch-size 5000]
+                           [--variable companies] [--keep-indexes | --drop-indexes]
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import os
+import runpy
+import time
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from sqlalchemy import func, select, text, update
+
+from logo_manifest import LogoManifest, get_logo_manifest
+from register import (
+    AsyncSessionLocal, Company, IS_SQLITE, bump_versions, company_name_key, dialect_insert, engine,
+)
+
+JSON_CHUNK_SIZE = 1 << 16
+
+# ==================== ИСТОЧНИКИ ====================
+
+def _iter_json_array(path: str) -> Iterator[Dict]:
+    # Массив разбирается по одному объекту: в памяти только текущий кусок файла
+    decoder = json.JSONDecoder()
+    with open(path, encoding='utf-8') as f:
+        buffer = f.read(JSON_CHUNK_SIZE).lstrip()
+        if not buffer.startswith('['):
+            raise ValueError(f'{path}: ожидается JSON-массив объектов')
+        position, eof = 1, False
+        while True:
+            while position < len(buffer) and (buffer[position].isspace() or buffer[position] == ','):
+                position += 1
+            if position < len(buffer) and buffer[position] == ']':
+                return
+            try:
+                item, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                # Объект не поместился в буфер — дочитываем следующий кусок
+                chunk = f.read(JSON_CHUNK_SIZE)
+                eof = not chunk
+                buffer, position = buffer[position:] + chunk, 0
+                continue
+            yield item
+
+def _iter_ndjson(path: str) -> Iterator[Dict]:
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def _iter_csv(path: str) -> Iterator[Dict]:
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        yield from csv.DictReader(f)
+
+def _iter_python(path: str, variable: str) -> Iterator[Dict]:
+    yield from runpy.run_path(path)[variable]
+
+def iter_source(path: str, variable: str = 'companies') -> Iterator[Dict]:
+    ext = os.path.splitext(path)[1].lower()
+    if ext in ('.ndjson', '.jsonl'):
+        return _iter_ndjson(path)
+    if ext == '.csv':
+        return _iter_csv(path)
+    if ext == '.py':
+        return _iter_python(path, variable)
+    return _iter_json_array(path)
+
+# ==================== ПРЕОБРАЗОВАНИЕ ====================
+
+def _int_or_none(value) -> Optional[int]:
+    if value is None or value == '':
+        return None
+    return int(value)
+
+def to_row(record: Dict, user_id: Optional[int], logos: LogoManifest) -> Optional[Dict]:
+    name = (record.get('name') or '').strip()
+    if not name:
+        return None
+    return {
+        'name': name,
+        'name_key': company_name_key(name),
+        'description': record.get('description', record.get('desc')),
+        'industry': record.get('industry'),
+        'location': record.get('location'),
+        'logo_url': logos.resolve(name, record.get('logo_url') or record.get('logo')),
+        'employee_count': _int_or_none(record.get('employee_count')),
+        'contact_email': record.get('contact_email') or record.get('email'),
+        'created_by': user_id,
+        # Номер изменения проставляет load_companies перед commit
+        'change_seq': None,
+    }
+
+def _batches(rows: Iterable[Dict], size: int) -> Iterator[List[Dict]]:
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+# ==================== ОТЛОЖЕННЫЕ ИНДЕКСЫ ====================
+
+FTS_TRIGGER = 'companies_fts_ai'
+FTS_COLUMNS = ('name', 'description', 'industry')
+
+def _fts_fold(column: str) -> str:
+    # Та же свёртка ё, что в триггерах migrations/versions/0001_initial.py
+    return f"replace(replace({column}, 'ё', 'е'), 'Ё', 'Е')"
+
+def _deferrable_indexes():
+    # Уникальный name_key нужен самой вставке (ON CONFLICT), его не трогаем
+    return [index for index in Company.__table__.indexes if not index.unique]
+
+async def drop_indexes(db) -> Optional[str]:
+    """Снимает вторичные индексы и триггер FTS; возвращает DDL триггера для восстановления"""
+    conn = await db.connection()
+    for index in _deferrable_indexes():
+        await conn.run_sync(lambda sync_conn, index=index: index.drop(sync_conn, checkfirst=True))
+    if not IS_SQLITE:
+        return None
+    trigger_sql = (await db.execute(
+        text("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = :name"), {'name': FTS_TRIGGER}
+    )).scalar()
+    if trigger_sql:
+        await db.execute(text(f'DROP TRIGGER {FTS_TRIGGER}'))
+    return trigger_sql
+
+async def restore_indexes(db, trigger_sql: Optional[str], first_new_id: int):
+    conn = await db.connection()
+    for index in _deferrable_indexes():
+        await conn.run_sync(lambda sync_conn, index=index: index.create(sync_conn, checkfirst=True))
+    if trigger_sql:
+        # Новые строки добавляем в FTS одним INSERT ... SELECT вместо триггера на каждую
+        columns = ', '.join(FTS_COLUMNS)
+        await db.execute(text(
+            f"INSERT INTO companies_fts(rowid, {columns}) "
+            f"SELECT id, {', '.join(_fts_fold(column) for column in FTS_COLUMNS)} FROM companies WHERE id >= :first_id"
+        ), {'first_id': first_new_id})
+        await db.execute(text(trigger_sql))
+
+# ==================== ЗАГРУЗКА ====================
+
+async def load_companies(records: Iterable[Dict], user_id: Optional[int] = None, batch_size: int = 5000,
+                         defer_indexes: Optional[bool] = None) -> Dict[str, int]:
+    if defer_indexes is None:
+        defer_indexes = IS_SQLITE
+    logos = get_logo_manifest()
+    stmt = dialect_insert(Company.__table__).on_conflict_do_nothing(index_elements=['name_key'])
+    read = 0
+    async with AsyncSessionLocal() as db:
+        if IS_SQLITE:
+            # pysqlite открывает транзакцию только перед DML, и DROP INDEX/DROP TRIGGER
+            # закоммитились бы сразу: при откате или ошибке индексы пропали бы насовсем
+            await db.execute(text('BEGIN IMMEDIATE'))
+        first_new_id = ((await db.execute(select(func.max(Company.id)))).scalar() or 0) + 1
+        trigger_sql = await drop_indexes(db) if defer_indexes else None
+
+        rows = (to_row(record, user_id, logos) for record in records)
+        for batch in _batches((row for row in rows if row is not None), batch_size):
+            await db.execute(stmt, batch)
+            read += len(batch)
+
+        # Пустой change_seq отличает наши строки от записей API, вставленных параллельно
+        new_rows = (Company.id >= first_new_id) & Company.change_seq.is_(None)
+        inserted = (await db.execute(select(func.count()).select_from(Company).where(new_rows))).scalar()
+        if not inserted:
+            # Откат возвращает и снятые индексы с триггером
+            await db.rollback()
+        else:
+            # Строка 'changes' в data_versions блокируется только до commit;
+            # UPDATE идёт до восстановления индексов, чтобы не обновлять их дважды
+            seq = await bump_versions(db, 'companies')
+            await db.execute(update(Company).where(new_rows).values(change_seq=seq))
+            if defer_indexes:
+                await restore_indexes(db, trigger_sql, first_new_id)
+            await db.commit()
+    await engine.dispose()
+    return {'read': read, 'inserted': inserted, 'skipped': read - inserted}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('source')
+    parser.add_argument('--user-id', type=int, default=None, help='created_by у новых компаний')
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument('--variable', default='companies', help='имя списка в .py-источнике')
+    indexes = parser.add_mutually_exclusive_group()
+    indexes.add_argument('--keep-indexes', dest='defer_indexes', action='store_false',
+                         help='не снимать индексы на время загрузки')
+    indexes.add_argument('--drop-indexes', dest='defer_indexes', action='store_true',
+                         help='снимать индексы и на PostgreSQL (companies недоступна API до конца загрузки)')
+    # По умолчанию индексы снимаются только на SQLite
+    parser.set_defaults(defer_indexes=None)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    stats = asyncio.run(load_companies(
+        iter_source(args.source, args.variable),
+        user_id=args.user_id,
+        batch_size=args.batch_size,
+        defer_indexes=args.defer_indexes,
+    ))
+    print(
+        f"Прочитано {stats['read']}, добавлено {stats['inserted']}, "
+        f"пропущено дублей {stats['skipped']} за {time.perf_counter() - started:.1f} с"
+    )
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Манифест логотипов компаний из assets/logo.
+
+Каталог сканируется один раз за процесс: для каждого файла считается sha256,
+индекс строится по домену (имя файла без расширения, например vtb.ru) и по
+названию компании. Поиск по названию, домену, URL clearbit или пути к файлу —
+обращение к словарю, без проверок файловой системы на каждую компанию.
+
+Манифестом пользуются сервер (logo_url при записи компаний), load_companies.py,
+seed_russian_companies.py и update_logo_paths.py.
+
+Usage:
+  python logo_manifest.py    # манифест в JSON: путь, sha256, размер, домены и названия
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from typing import Dict, Optional
+
+LOGO_DIR = 'assets/logo'  # так путь хранится в logo_url и объявлен в pubspec.yaml
+LOGO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), LOGO_DIR)
+
+CLEARBIT_URL = re.compile(r'^https?://logo\.clearbit\.com/([^/?#]+)')
+
+# Домены, логотип которых лежит под другим именем файла
+DOMAIN_ALIASES = {
+    'sber.ru': 'sber - logo.png',
+    'samokat.tech': 'samolet.ru.png',  # Заменяем на Самолёт
+    'vir.nw.ru': 'nrcki.ru.png',  # Заменяем на НИЦ
+    'tochka.com': 'tinkoff.ru.png',  # Заменяем на Тинькофф
+    'practicum.yandex.ru': 'yandex.ru.png',  # Заменяем на Яндекс
+}
+
+# Название компании -> домен её логотипа
+COMPANY_DOMAINS = {
+    'Сбер': 'sber.ru',
+    'ВТБ': 'vtb.ru',
+    'Альфа-Банк': 'alfabank.ru',
+    'Тинькофф': 'tinkoff.ru',
+    'Газпром нефть': 'gazprom-neft.ru',
+    'Роснефть': 'rosneft.ru',
+    'Лукойл': 'lukoil.ru',
+    'Сибур': 'sibur.ru',
+    'Яндекс': 'yandex.ru',
+    'VK': 'vk.com',
+    '1С': '1c.ru',
+    'Kaspersky': 'kaspersky.ru',
+    'Ростелеком': 'rt.ru',
+    'МТС': 'mts.ru',
+    'МегаФон': 'megafon.ru',
+    'Билайн': 'beeline.ru',
+    'Ozon': 'ozon.ru',
+    'Wildberries': 'wildberries.ru',
+    'Яндекс Маркет': 'market.yandex.ru',
+    'Авито': 'avito.ru',
+    'HeadHunter': 'hh.ru',
+    'Яндекс Еда': 'eda.yandex.ru',
+    'СДЭК': 'cdek.ru',
+    'Почта России': 'pochta.ru',
+    'Selectel': 'selectel.ru',
+    'СКБ Контур': 'kontur.ru',
+    '2ГИС': '2gis.ru',
+    'Инвитро': 'invitro.ru',
+    'МГУ им. М.В. Ломоносова': 'msu.ru',
+    'МФТИ': 'mipt.ru',
+    'Университет ИТМО': 'itmo.ru',
+    'НИУ ВШЭ': 'hse.ru',
+    'Сколтех': 'skoltech.ru',
+    'НИТУ МИСИС': 'misis.ru',
+    'НИЦ «Курчатовский институт»': 'nrcki.ru',
+    'ИСП РАН': 'ispras.ru',
+    'РГАУ-МСХА им. Тимирязева': 'timacad.ru',
+    'Росатом': 'rosatom.ru',
+    'Ростех': 'rostec.ru',
+    'РЖД': 'rzd.ru',
+    'Аэрофлот': 'aeroflot.ru',
+    'S7 Airlines': 's7.ru',
+    'Газпромбанк': 'gazprombank.ru',
+    'Россельхозбанк': 'rshb.ru',
+    'Ингосстрах': 'ingos.ru',
+    'РЕСО-Гарантия': 'reso.ru',
+    'АльфаСтрахование': 'alfastrah.ru',
+    'X5 Group': 'x5.ru',
+    'Магнит': 'magnit.ru',
+    'ВкусВилл': 'vkusvill.ru',
+    'М.Видео-Эльдорадо': 'mvideo.ru',
+    'DNS': 'dns-shop.ru',
+    'Ситилинк': 'citilink.ru',
+    'Hoff': 'hoff.ru',
+    "O'Кей": 'okmarket.ru',
+    'Лента': 'lenta.com',
+    'Петрович': 'petrovich.ru',
+    'ПИК': 'pik.ru',
+    'Самолёт': 'samolet.ru',
+    'ЛСР Групп': 'lsrgroup.ru',
+    'Positive Technologies': 'ptsecurity.com',
+    'NAUMEN': 'naumen.ru',
+    'КРОК': 'croc.ru',
+    'T1': 't1.ru',
+    'YADRO': 'yadro.com',
+    'СберМаркет': 'sbermarket.ru',
+    'Fix Price': 'fix-price.ru',
+    'Совкомбанк': 'sovcombank.ru',
+    'YooMoney': 'yoomoney.ru',
+    'ЮKassa': 'yookassa.ru',
+    'QIWI': 'qiwi.com',
+    'ВСК': 'vsk.ru',
+    'СОГАЗ': 'sogaz.ru',
+    'Делимобиль': 'delimobil.ru',
+    'BelkaCar': 'belkacar.ru',
+    'Whoosh': 'whoosh.bike',
+    'Яндекс Драйв': 'drive.yandex.ru',
+    'Delivery Club': 'delivery-club.ru',
+    'Утконос': 'utkonos.ru',
+    'Dodo Pizza': 'dodopizza.ru',
+    'Детский мир': 'detmir.ru',
+    "O'STIN": 'ostin.com',
+    'Gloria Jeans': 'gloria-jeans.ru',
+    'Kari': 'kari.com',
+    'KazanExpress': 'kazanexpress.ru',
+    'Petshop.ru': 'petshop.ru',
+    'Apteka.ru': 'apteka.ru',
+    'Skillbox': 'skillbox.ru',
+    'Нетология': 'netology.ru',
+    'GeekBrains': 'gb.ru',
+    'Skyeng': 'skyeng.ru',
+    'ivi': 'ivi.ru',
+    'Okko': 'okko.tv',
+    'KION': 'kion.ru',
+}
+
+def _name_key(name: str) -> str:
+    # Как company_name_key в register.py: без регистра и лишних пробелов
+    return ' '.join(name.split()).casefold()
+
+class LogoManifest:
+    """Файлы логотипов с хэшами и индексы по домену и названию компании"""
+
+    def __init__(self, entries: Dict[str, dict]):
+        self.entries = entries  # имя файла -> {'path', 'sha256', 'size'}
+        self.by_domain: Dict[str, str] = {}
+        for filename in entries:
+            self.by_domain[os.path.splitext(filename)[0].casefold()] = filename
+        for domain, filename in DOMAIN_ALIASES.items():
+            if filename in entries:
+                self.by_domain[domain] = filename
+        self.by_name: Dict[str, str] = {}
+        for name, domain in COMPANY_DOMAINS.items():
+            filename = self.by_domain.get(domain)
+            if filename:
+                self.by_name[_name_key(name)] = filename
+
+    @classmethod
+    def scan(cls, root: str = LOGO_ROOT) -> 'LogoManifest':
+        entries = {}
+        try:
+            filenames = sorted(os.listdir(root))
+        except FileNotFoundError:
+            filenames = []
+        for filename in filenames:
+            path = os.path.join(root, filename)
+            if not os.path.isfile(path) or filename.startswith('.'):
+                continue
+            with open(path, 'rb') as f:
+                data = f.read()
+            entries[filename] = {
+                'path': f'{LOGO_DIR}/{filename}',
+                'sha256': hashlib.sha256(data).hexdigest(),
+                'size': len(data),
+            }
+        return cls(entries)
+
+    def lookup(self, name: Optional[str] = None, logo: Optional[str] = None) -> Optional[dict]:
+        """
+        Запись манифеста для логотипа: по URL clearbit, пути, имени файла или домену из logo,
+        а если logo не задан — по названию компании.
+        """
+        if logo:
+            match = CLEARBIT_URL.match(logo)
+            key = match.group(1) if match else os.path.basename(logo.split('?', 1)[0])
+            filename = key if key in self.entries else self.by_domain.get(key.casefold())
+            return self.entries[filename] if filename else None
+        if name:
+            filename = self.by_name.get(_name_key(name))
+            return self.entries[filename] if filename else None
+        return None
+
+    def resolve(self, name: Optional[str] = None, logo: Optional[str] = None) -> Optional[str]:
+        """logo_url для записи: локальный путь из манифеста, иначе исходное значение"""
+        entry = self.lookup(name, logo)
+        return entry['path'] if entry else (logo or None)
+
+    def to_dict(self) -> Dict[str, dict]:
+        domains: Dict[str, list] = {}
+        for domain, filename in self.by_domain.items():
+            domains.setdefault(filename, []).append(domain)
+        names: Dict[str, list] = {}
+        for name, domain in COMPANY_DOMAINS.items():
+            filename = self.by_domain.get(domain)
+            if filename:
+                names.setdefault(filename, []).append(name)
+        return {
+            filename: {**entry, 'domains': sorted(domains.get(filename, [])), 'names': names.get(filename, [])}
+            for filename, entry in self.entries.items()
+        }
+
+_manifest: Optional[LogoManifest] = None
+_manifest_lock = threading.Lock()
+
+def get_logo_manifest() -> LogoManifest:
+    """Манифест процесса: каталог сканируется при первом обращении"""
+    global _manifest
+    if _manifest is None:
+        with _manifest_lock:
+            if _manifest is None:
+                _manifest = LogoManifest.scan()
+    return _manifest
+
+def main():
+    print(json.dumps(get_logo_manifest().to_dict(), ensure_ascii=False, indent=2))
+
+if __name__ == '__main__':
+    main()
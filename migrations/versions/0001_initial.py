@@ -0,0 +1,231 @@
+"""Начальная схема: пользователи, компании, лента, визитки, подписки, избранное
+
+Повторяет схему, которую раньше создавал Base.metadata.create_all, вместе
+с индексами каталога и ленты и полнотекстовым поиском:
+SQLite — FTS5-таблицы с триггерами, PostgreSQL — GIN-индексы по tsvector.
+
+Базу, созданную ещё через create_all, помечают `alembic stamp 0001` и затем
+обновляют `alembic upgrade head`: индексы и FTS, которых create_all не создавал,
+достроит ревизия 0007.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+PG_COMPANY_SEARCH_VECTOR = (
+    "(setweight(to_tsvector('russian', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('russian', coalesce(industry, '')), 'B') || "
+    "setweight(to_tsvector('russian', coalesce(description, '')), 'C'))"
+)
+PG_POST_SEARCH_VECTOR = "to_tsvector('russian', coalesce(content, ''))"
+
+# Индексы FTS5 с внешним содержимым: текст хранится только в companies/posts,
+# а триггеры поддерживают индекс при любой записи, в том числе из скриптов,
+# которые пишут в cofound.db напрямую. unicode61 приводит кириллицу к нижнему
+# регистру, prefix='2 3' ускоряет префиксные запросы. remove_diacritics
+# работает только для латиницы, поэтому ё сворачивается в е явно.
+FTS_TOKENIZE = "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'"
+SEARCH_INDEXES = {
+    'companies_fts': ('companies', ('name', 'description', 'industry')),
+    'posts_fts': ('posts', ('content',)),
+}
+
+
+def _fts_fold(expr):
+    return f"replace(replace({expr}, 'ё', 'е'), 'Ё', 'Е')"
+
+
+def _fts_values(prefix, columns):
+    return ', '.join(_fts_fold(f'{prefix}.{column}') for column in columns)
+
+
+def _create_fts(index, table, columns):
+    column_list = ', '.join(columns)
+    delete_old = (
+        f"INSERT INTO {index}({index}, rowid, {column_list}) "
+        f"VALUES ('delete', old.id, {_fts_values('old', columns)});"
+    )
+    insert_new = (
+        f"INSERT INTO {index}(rowid, {column_list}) "
+        f"VALUES (new.id, {_fts_values('new', columns)});"
+    )
+    op.execute(
+        f"CREATE VIRTUAL TABLE {index} USING fts5("
+        f"{column_list}, content = '{table}', content_rowid = 'id', {FTS_TOKENIZE})"
+    )
+    op.execute(f"CREATE TRIGGER {index}_ai AFTER INSERT ON {table} BEGIN {insert_new} END")
+    op.execute(f"CREATE TRIGGER {index}_ad AFTER DELETE ON {table} BEGIN {delete_old} END")
+    # Только при изменении текста: обновления счётчиков лайков индекс не трогают
+    op.execute(
+        f"CREATE TRIGGER {index}_au AFTER UPDATE OF {column_list} ON {table} "
+        f"BEGIN {delete_old} {insert_new} END"
+    )
+    # 'rebuild' читает исходный текст без свёртки ё, поэтому заполняем вручную
+    op.execute(
+        f"INSERT INTO {index}(rowid, {column_list}) "
+        f"SELECT id, {', '.join(_fts_fold(column) for column in columns)} FROM {table}"
+    )
+
+
+def _drop_fts(index):
+    for suffix in ('ai', 'ad', 'au'):
+        op.execute(f"DROP TRIGGER IF EXISTS {index}_{suffix}")
+    op.execute(f"DROP TABLE IF EXISTS {index}")
+
+
+def upgrade():
+    op.create_table(
+        'users',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('email', sa.String(), nullable=True),
+        sa.Column('password_hash', sa.String(), nullable=True),
+        sa.Column('name', sa.String(), nullable=True),
+        sa.Column('phone', sa.String(), nullable=True),
+        sa.Column('position', sa.String(), nullable=True),
+        sa.Column('company_name', sa.String(), nullable=True),
+        sa.Column('avatar_url', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_users_id', 'users', ['id'])
+    op.create_index('ix_users_email', 'users', ['email'], unique=True)
+
+    op.create_table(
+        'companies',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=True),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('industry', sa.String(), nullable=True),
+        sa.Column('location', sa.String(), nullable=True),
+        sa.Column('logo_url', sa.String(), nullable=True),
+        sa.Column('employee_count', sa.Integer(), nullable=True),
+        sa.Column('contact_email', sa.String(), nullable=True),
+        sa.Column('created_by', sa.Integer(), sa.ForeignKey('users.id'), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_companies_id', 'companies', ['id'])
+    op.create_index('ix_companies_name', 'companies', ['name'])
+    op.create_index('ix_companies_name_id', 'companies', ['name', 'id'])
+    op.create_index('ix_companies_created_at_id', 'companies', ['created_at', 'id'])
+    op.create_index('ix_companies_industry_name_id', 'companies', ['industry', 'name', 'id'])
+    op.create_index('ix_companies_location_name_id', 'companies', ['location', 'name', 'id'])
+
+    op.create_table(
+        'posts',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=True),
+        sa.Column('company_id', sa.Integer(), sa.ForeignKey('companies.id'), nullable=True),
+        sa.Column('content', sa.Text(), nullable=True),
+        sa.Column('image_url', sa.String(), nullable=True),
+        sa.Column('likes_count', sa.Integer(), nullable=True),
+        sa.Column('comments_count', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_posts_id', 'posts', ['id'])
+    op.create_index('ix_posts_created_at_id', 'posts', ['created_at', 'id'])
+
+    op.create_table(
+        'comments',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('post_id', sa.Integer(), sa.ForeignKey('posts.id'), nullable=True),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=True),
+        sa.Column('content', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_comments_id', 'comments', ['id'])
+
+    op.create_table(
+        'likes',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('post_id', sa.Integer(), sa.ForeignKey('posts.id'), nullable=True),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_likes_id', 'likes', ['id'])
+
+    op.create_table(
+        'business_cards',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=True),
+        sa.Column('name', sa.String(), nullable=True),
+        sa.Column('position', sa.String(), nullable=True),
+        sa.Column('company_name', sa.String(), nullable=True),
+        sa.Column('phone', sa.String(), nullable=True),
+        sa.Column('email', sa.String(), nullable=True),
+        sa.Column('social_media_link', sa.String(), nullable=True),
+        sa.Column('qr_code_data', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_business_cards_id', 'business_cards', ['id'])
+
+    op.create_table(
+        'subscriptions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=True),
+        sa.Column('plan_type', sa.String(), nullable=True),
+        sa.Column('start_date', sa.DateTime(), nullable=True),
+        sa.Column('end_date', sa.DateTime(), nullable=True),
+        sa.Column('status', sa.String(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_subscriptions_id', 'subscriptions', ['id'])
+
+    op.create_table(
+        'favorite_cards',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=True),
+        sa.Column('business_card_id', sa.Integer(), sa.ForeignKey('business_cards.id'), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_favorite_cards_id', 'favorite_cards', ['id'])
+
+    op.create_table(
+        'favorite_companies',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=True),
+        sa.Column('company_id', sa.Integer(), sa.ForeignKey('companies.id'), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_favorite_companies_id', 'favorite_companies', ['id'])
+
+    dialect = op.get_context().dialect.name
+    if dialect == 'sqlite':
+        for index, (table, columns) in SEARCH_INDEXES.items():
+            _create_fts(index, table, columns)
+    elif dialect == 'postgresql':
+        op.create_index(
+            'ix_companies_search', 'companies', [sa.text(PG_COMPANY_SEARCH_VECTOR)], postgresql_using='gin'
+        )
+        op.create_index(
+            'ix_posts_search', 'posts', [sa.text(PG_POST_SEARCH_VECTOR)], postgresql_using='gin'
+        )
+
+
+def downgrade():
+    dialect = op.get_context().dialect.name
+    if dialect == 'sqlite':
+        for index in SEARCH_INDEXES:
+            _drop_fts(index)
+
+    for table in (
+        'favorite_companies', 'favorite_cards', 'subscriptions', 'business_cards',
+        'likes', 'comments', 'posts', 'companies', 'users',
+    ):
+        op.drop_table(table)
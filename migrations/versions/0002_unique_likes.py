@@ -0,0 +1,33 @@
+"""Уникальный лайк на пару (post_id, user_id)
+
+Перед созданием индекса удаляет дубли, которые могли появиться из-за гонки
+check-then-insert, и пересчитывает posts.likes_count по оставшимся лайкам.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute(
+        "DELETE FROM likes WHERE id NOT IN ("
+        "SELECT MIN(id) FROM likes GROUP BY post_id, user_id)"
+    )
+    op.execute(
+        "UPDATE posts SET likes_count = ("
+        "SELECT COUNT(*) FROM likes WHERE likes.post_id = posts.id)"
+    )
+    op.create_index('uq_likes_post_user', 'likes', ['post_id', 'user_id'], unique=True)
+
+
+def downgrade():
+    op.drop_index('uq_likes_post_user', table_name='likes')
@@ -0,0 +1,22 @@
+"""Индекс под постраничную выдачу комментариев поста
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_comments_post_created_at_id', 'comments', ['post_id', 'created_at', 'id'])
+
+
+def downgrade():
+    op.drop_index('ix_comments_post_created_at_id', table_name='comments')
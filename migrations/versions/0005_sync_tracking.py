@@ -0,0 +1,60 @@
+"""updated_at, change_seq и надгробия для дельта-синхронизации (/sync)
+
+Существующим строкам change_seq проставляется равным id, а счётчик изменений
+в data_versions начинается с максимального из них, так что первая
+синхронизация клиента получает всё, а дальнейшие — только новые изменения.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+SYNC_TABLES = ('companies', 'posts', 'business_cards', 'favorite_cards', 'favorite_companies')
+
+
+def upgrade():
+    for table in SYNC_TABLES:
+        op.add_column(table, sa.Column('updated_at', sa.DateTime(), nullable=True))
+        op.add_column(table, sa.Column('change_seq', sa.Integer(), nullable=True))
+        op.execute(f"UPDATE {table} SET updated_at = created_at, change_seq = id")
+        op.create_index(f'ix_{table}_change_seq', table, ['change_seq'])
+
+    op.create_table(
+        'tombstones',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('collection', sa.String(), nullable=False),
+        sa.Column('row_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('change_seq', sa.Integer(), nullable=False),
+        sa.Column('deleted_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_tombstones_id', 'tombstones', ['id'])
+    op.create_index('ix_tombstones_change_seq', 'tombstones', ['change_seq'])
+
+    max_ids = ' UNION ALL '.join(f"SELECT MAX(id) AS max_id FROM {table}" for table in SYNC_TABLES)
+    op.execute("DELETE FROM data_versions WHERE name = 'changes'")
+    op.execute(
+        "INSERT INTO data_versions (name, version, updated_at) "
+        f"SELECT 'changes', COALESCE(MAX(max_id), 0), CURRENT_TIMESTAMP FROM ({max_ids}) AS ids"
+    )
+
+
+def downgrade():
+    op.execute("DELETE FROM data_versions WHERE name = 'changes'")
+    op.drop_index('ix_tombstones_change_seq', table_name='tombstones')
+    op.drop_index('ix_tombstones_id', table_name='tombstones')
+    op.drop_table('tombstones')
+    for table in reversed(SYNC_TABLES):
+        op.drop_index(f'ix_{table}_change_seq', table_name=table)
+        op.drop_column(table, 'change_seq')
+        op.drop_column(table, 'updated_at')
@@ -0,0 +1,72 @@
+"""Естественные ключи для идемпотентного импорта: companies.name_key и posts.content_hash
+
+name_key проставляется первой (по id) компании с каждым нормализованным
+названием, у дублей остаётся NULL — уникальный индекс NULL не сравнивает.
+content_hash получают посты компаний, по первому на пару (company_id, content):
+по этой паре сидеры раньше искали дубли на клиенте.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+"""
+import hashlib
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+# Те же формулы, что company_name_key и post_content_hash в register.py
+def _name_key(name):
+    return ' '.join(name.split()).casefold()
+
+
+def _content_hash(company_id, content):
+    return hashlib.sha256(f'{company_id or ""}\n{content}'.encode('utf-8')).hexdigest()
+
+
+def _backfill(conn, table, column, rows, key):
+    seen = set()
+    updates = []
+    for row_id, *values in rows:
+        value = key(*values)
+        if value not in seen:
+            seen.add(value)
+            updates.append({'row_id': row_id, 'value': value})
+    if updates:
+        conn.execute(sa.text(f"UPDATE {table} SET {column} = :value WHERE id = :row_id"), updates)
+
+
+def upgrade():
+    op.add_column('companies', sa.Column('name_key', sa.String(), nullable=True))
+    op.add_column('posts', sa.Column('content_hash', sa.String(length=64), nullable=True))
+
+    conn = op.get_bind()
+    _backfill(
+        conn, 'companies', 'name_key',
+        conn.execute(sa.text("SELECT id, name FROM companies WHERE name IS NOT NULL ORDER BY id")),
+        _name_key,
+    )
+    _backfill(
+        conn, 'posts', 'content_hash',
+        conn.execute(sa.text(
+            "SELECT id, company_id, content FROM posts "
+            "WHERE company_id IS NOT NULL AND content IS NOT NULL ORDER BY id"
+        )),
+        _content_hash,
+    )
+
+    op.create_index('uq_companies_name_key', 'companies', ['name_key'], unique=True)
+    op.create_index('uq_posts_content_hash', 'posts', ['content_hash'], unique=True)
+
+
+def downgrade():
+    op.drop_index('uq_posts_content_hash', table_name='posts')
+    op.drop_index('uq_companies_name_key', table_name='companies')
+    op.drop_column('posts', 'content_hash')
+    op.drop_column('companies', 'name_key')
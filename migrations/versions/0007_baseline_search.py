@@ -0,0 +1,81 @@
+"""Индексы и полнотекстовый поиск для баз, созданных через create_all
+
+База старой версии сервера (Base.metadata.create_all) после `alembic stamp 0001`
+получает таблицы 0001, но не её составные индексы каталога и ленты и не
+FTS5-таблицы с триггерами (в PostgreSQL — GIN-индексы). Ревизия создаёт то,
+чего не хватает, и ничего не трогает в базах, созданных миграциями.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17
+"""
+import importlib.util
+import os
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def _load_initial():
+    # Определения FTS и поисковых индексов берём из 0001, чтобы они не разошлись
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '0001_initial.py')
+    spec = importlib.util.spec_from_file_location('migration_0001_initial', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+initial = _load_initial()
+
+BASELINE_INDEXES = {
+    'companies': [
+        ('ix_companies_name_id', ['name', 'id']),
+        ('ix_companies_created_at_id', ['created_at', 'id']),
+        ('ix_companies_industry_name_id', ['industry', 'name', 'id']),
+        ('ix_companies_location_name_id', ['location', 'name', 'id']),
+    ],
+    'posts': [
+        ('ix_posts_created_at_id', ['created_at', 'id']),
+    ],
+}
+PG_SEARCH_INDEXES = {
+    'companies': ('ix_companies_search', initial.PG_COMPANY_SEARCH_VECTOR),
+    'posts': ('ix_posts_search', initial.PG_POST_SEARCH_VECTOR),
+}
+
+
+def upgrade():
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    existing = {table: {index['name'] for index in inspector.get_indexes(table)} for table in BASELINE_INDEXES}
+
+    for table, indexes in BASELINE_INDEXES.items():
+        for name, columns in indexes:
+            if name not in existing[table]:
+                op.create_index(name, table, columns)
+
+    dialect = conn.dialect.name
+    if dialect == 'sqlite':
+        tables = {
+            row[0] for row in conn.execute(sa.text("SELECT name FROM sqlite_master WHERE type = 'table'"))
+        }
+        for index, (table, columns) in initial.SEARCH_INDEXES.items():
+            if index not in tables:
+                # Снимаем триггеры-сироты, если таблицу индекса когда-то удалили вручную
+                initial._drop_fts(index)
+                initial._create_fts(index, table, columns)
+    elif dialect == 'postgresql':
+        for table, (name, vector) in PG_SEARCH_INDEXES.items():
+            if name not in existing[table]:
+                op.create_index(name, table, [sa.text(vector)], postgresql_using='gin')
+
+
+def downgrade():
+    # Всё, что создаёт upgrade, принадлежит схеме 0001 и нужно ревизиям до этой
+    pass
@@ -1,20 +1,199 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from typing import Optional
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, ForeignKey, Boolean
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from pydantic_core import to_json
+from typing import Any, Dict, List, Literal, Optional
+from sqlalchemy import event, Column, Integer, String, Text, DateTime, ForeignKey, Boolean, Index, bindparam, tuple_, text, func, or_, select, insert, delete, update, literal, null
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy.exc import IntegrityError, TimeoutError as SQLAlchemyTimeoutError
+from sqlalchemy.orm import joinedload, relationship
 from passlib.hash import bcrypt
-from datetime import datetime
+from logo_manifest import get_logo_manifest
+from starlette.datastructures import Headers, MutableHeaders
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
 import uuid
+import zlib
 
-app = FastAPI()
-engine = create_engine('sqlite:///cofound.db')
+try:
+    import brotli
+except ImportError:  # brotli необязателен: без него клиенты получают gzip
+    brotli = None
+
+@asynccontextmanager
+async def lifespan(app):
+    # Схемой управляют миграции (alembic upgrade head), приложение её не создаёт
+    get_logo_manifest()  # assets/logo сканируется один раз до первых запросов
+    if LIKE_BUFFER_ENABLED:
+        like_buffer.start()
+    yield
+    # Сначала дописываем накопленные лайки, потом закрываем пул
+    await like_buffer.stop()
+    await engine.dispose()
+
+app = FastAPI(lifespan=lifespan)
+
+# Пул соединений ограничен: не больше DB_POOL_SIZE + DB_MAX_OVERFLOW соединений,
+# запрос ждёт свободное соединение не дольше DB_POOL_TIMEOUT секунд (потом 503).
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', '5'))
+DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', '10'))
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', '30'))
+
+# Адрес БД берётся из окружения, например
+# DATABASE_URL=postgresql+asyncpg://cofound:secret@db:5432/cofound
+DATABASE_URL = os.environ.get('DATABASE_URL', 'sqlite+aiosqlite:///cofound.db')
+
+engine = create_async_engine(
+    DATABASE_URL,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_pre_ping=True,
+)
 Base = declarative_base()
-SessionLocal = sessionmaker(bind=engine)
+
+# Профили PRAGMA для SQLite, применяются к каждому новому соединению пула.
+# production: WAL (читатели не блокируются писателями), synchronous=NORMAL
+# (в WAL безопасно при сбое процесса), mmap и увеличенный кэш страниц,
+# ожидание блокировки вместо мгновенного "database is locked".
+# Любое значение можно переопределить переменной окружения SQLITE_<ИМЯ>,
+# например SQLITE_BUSY_TIMEOUT=10000.
+SQLITE_PROFILES = {
+    'default': {},
+    'production': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 5000,
+        'cache_size': -65536,  # в КиБ: 64 МиБ
+        'mmap_size': 268435456,  # 256 МиБ
+        'temp_store': 'MEMORY',
+    },
+}
+SQLITE_PROFILE = os.environ.get('SQLITE_PROFILE', 'production')
+
+def sqlite_pragmas(profile: str):
+    pragmas = dict(SQLITE_PROFILES[profile])
+    for name in ('journal_mode', 'synchronous', 'busy_timeout', 'cache_size', 'mmap_size', 'temp_store'):
+        override = os.environ.get(f'SQLITE_{name.upper()}')
+        if override:
+            pragmas[name] = override
+    return pragmas
+
+def apply_sqlite_pragmas(dbapi_connection, pragmas):
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+    finally:
+        cursor.close()
+
+SQLITE_PRAGMAS = sqlite_pragmas(SQLITE_PROFILE)
+
+IS_SQLITE = engine.dialect.name == 'sqlite'
+
+if IS_SQLITE:
+    @event.listens_for(engine.sync_engine, 'connect')
+    def _on_sqlite_connect(dbapi_connection, connection_record):
+        apply_sqlite_pragmas(dbapi_connection, SQLITE_PRAGMAS)
+
+# expire_on_commit=False: после commit объекты остаются читаемыми без ленивых запросов
+AsyncSessionLocal = async_sessionmaker(engine, expire_on_commit=False)
+
+class PoolMetrics:
+    """Сколько соединений выдано и как долго запросы их удерживают"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._checked_out_at = {}
+        self.checkouts_total = 0
+        self.timeouts_total = 0
+        self.hold_seconds_total = 0.0
+        self.hold_seconds_max = 0.0
+
+    def on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        with self._lock:
+            self.checkouts_total += 1
+            self._checked_out_at[id(dbapi_connection)] = time.perf_counter()
+
+    def on_checkin(self, dbapi_connection, connection_record):
+        with self._lock:
+            started = self._checked_out_at.pop(id(dbapi_connection), None)
+            if started is None:
+                return
+            held = time.perf_counter() - started
+            self.hold_seconds_total += held
+            self.hold_seconds_max = max(self.hold_seconds_max, held)
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts_total += 1
+
+    def snapshot(self, pool):
+        with self._lock:
+            returned = self.checkouts_total - len(self._checked_out_at)
+            return {
+                'pool_size': pool.size(),
+                'max_overflow': DB_MAX_OVERFLOW,
+                'checked_out': pool.checkedout(),
+                'overflow': max(pool.overflow(), 0),
+                'idle': pool.checkedin(),
+                'checkouts_total': self.checkouts_total,
+                'timeouts_total': self.timeouts_total,
+                'hold_ms_avg': round(self.hold_seconds_total / returned * 1000, 3) if returned else 0.0,
+                'hold_ms_max': round(self.hold_seconds_max * 1000, 3),
+            }
+
+pool_metrics = PoolMetrics()
+event.listen(engine.sync_engine.pool, 'checkout', pool_metrics.on_checkout)
+event.listen(engine.sync_engine.pool, 'checkin', pool_metrics.on_checkin)
+
+def dialect_insert(model):
+    """INSERT с поддержкой ON CONFLICT для текущей СУБД (SQLite или PostgreSQL)"""
+    if IS_SQLITE:
+        return sqlite_insert(model)
+    return postgresql_insert(model)
+
+async def get_db():
+    """Сессия БД на время запроса; закрывается при любом исходе, в том числе при исключении"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+@app.exception_handler(SQLAlchemyTimeoutError)
+async def pool_timeout_handler(request, exc):
+    # Пул исчерпан: лучше быстро отказать, чем копить запросы
+    pool_metrics.record_timeout()
+    return JSONResponse(
+        status_code=503,
+        content={'detail': 'Сервер перегружен, повторите попытку позже'},
+        headers={'Retry-After': '1'},
+    )
 
 # ==================== МОДЕЛИ БАЗЫ ДАННЫХ ====================
 
+# Выражения полнотекстовых GIN-индексов PostgreSQL. Запросы поиска используют
+# ровно те же выражения, иначе планировщик не сможет взять индекс.
+PG_COMPANY_SEARCH_VECTOR = (
+    "(setweight(to_tsvector('russian', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('russian', coalesce(industry, '')), 'B') || "
+    "setweight(to_tsvector('russian', coalesce(description, '')), 'C'))"
+)
+PG_POST_SEARCH_VECTOR = "to_tsvector('russian', coalesce(content, ''))"
+
 class User(Base):
     __tablename__ = 'users'
     id = Column(Integer, primary_key=True, index=True)
@@ -39,6 +218,7 @@ class Company(Base):
     __tablename__ = 'companies'
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True)
+    name_key = Column(String)  # нормализованное название — естественный ключ, см. company_name_key
     description = Column(Text)
     industry = Column(String)
     location = Column(String)
@@ -47,11 +227,23 @@ class Company(Base):
     contact_email = Column(String)
     created_by = Column(Integer, ForeignKey('users.id'))
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    change_seq = Column(Integer, index=True)  # номер последнего изменения для /sync
     
     # Связи
     created_by_user = relationship("User", back_populates="companies")
     posts = relationship("Post", back_populates="company")
 
+    # Индексы под каталог: фильтр по отрасли/городу + сортировка и курсор (name, id) или (created_at, id)
+    __table_args__ = (
+        Index('ix_companies_name_id', 'name', 'id'),
+        Index('ix_companies_created_at_id', 'created_at', 'id'),
+        Index('ix_companies_industry_name_id', 'industry', 'name', 'id'),
+        Index('ix_companies_location_name_id', 'location', 'name', 'id'),
+        Index('uq_companies_name_key', 'name_key', unique=True),
+        Index('ix_companies_search', text(PG_COMPANY_SEARCH_VECTOR), postgresql_using='gin').ddl_if(dialect='postgresql'),
+    )
+
 class Post(Base):
     __tablename__ = 'posts'
     id = Column(Integer, primary_key=True, index=True)
@@ -59,9 +251,12 @@ class Post(Base):
     company_id = Column(Integer, ForeignKey('companies.id'), nullable=True)
     content = Column(Text)
     image_url = Column(String, nullable=True)
+    content_hash = Column(String(64), nullable=True)  # ключ импортированных постов, см. post_content_hash
     likes_count = Column(Integer, default=0)
     comments_count = Column(Integer, default=0)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    change_seq = Column(Integer, index=True)  # номер последнего изменения для /sync
     
     # Связи
     user = relationship("User", back_populates="posts")
@@ -69,6 +264,13 @@ class Post(Base):
     comments = relationship("Comment", back_populates="post")
     likes = relationship("Like", back_populates="post")
 
+    # Индекс под ленту: ORDER BY created_at DESC, id DESC + курсор (created_at, id)
+    __table_args__ = (
+        Index('ix_posts_created_at_id', 'created_at', 'id'),
+        Index('uq_posts_content_hash', 'content_hash', unique=True),
+        Index('ix_posts_search', text(PG_POST_SEARCH_VECTOR), postgresql_using='gin').ddl_if(dialect='postgresql'),
+    )
+
 class Comment(Base):
     __tablename__ = 'comments'
     id = Column(Integer, primary_key=True, index=True)
@@ -81,6 +283,11 @@ class Comment(Base):
     post = relationship("Post", back_populates="comments")
     user = relationship("User", back_populates="comments")
 
+    # Индекс под комментарии поста: WHERE post_id = ? ORDER BY created_at DESC, id DESC + курсор
+    __table_args__ = (
+        Index('ix_comments_post_created_at_id', 'post_id', 'created_at', 'id'),
+    )
+
 class Like(Base):
     __tablename__ = 'likes'
     id = Column(Integer, primary_key=True, index=True)
@@ -92,6 +299,11 @@ class Like(Base):
     post = relationship("Post", back_populates="likes")
     user = relationship("User", back_populates="likes")
 
+    # Один лайк на пользователя: повторный INSERT гасится ON CONFLICT DO NOTHING
+    __table_args__ = (
+        Index('uq_likes_post_user', 'post_id', 'user_id', unique=True),
+    )
+
 class BusinessCard(Base):
     __tablename__ = 'business_cards'
     id = Column(Integer, primary_key=True, index=True)
@@ -104,6 +316,8 @@ class BusinessCard(Base):
     social_media_link = Column(String)
     qr_code_data = Column(String)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    change_seq = Column(Integer, index=True)  # номер последнего изменения для /sync
     
     # Связи
     user = relationship("User", back_populates="business_cards")
@@ -127,6 +341,8 @@ class FavoriteCard(Base):
     user_id = Column(Integer, ForeignKey('users.id'))
     business_card_id = Column(Integer, ForeignKey('business_cards.id'))
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    change_seq = Column(Integer, index=True)  # номер последнего изменения для /sync
 
 # Избранные компании
 class FavoriteCompany(Base):
@@ -135,6 +351,25 @@ class FavoriteCompany(Base):
     user_id = Column(Integer, ForeignKey('users.id'))
     company_id = Column(Integer, ForeignKey('companies.id'))
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    change_seq = Column(Integer, index=True)  # номер последнего изменения для /sync
+
+class DataVersion(Base):
+    """Счётчик изменений на коллекцию: из него строятся ETag списков"""
+    __tablename__ = 'data_versions'
+    name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+class Tombstone(Base):
+    """Удалённая строка синхронизируемой коллекции: клиент узнаёт об удалении через /sync"""
+    __tablename__ = 'tombstones'
+    id = Column(Integer, primary_key=True, index=True)
+    collection = Column(String, nullable=False)
+    row_id = Column(Integer, nullable=False)
+    user_id = Column(Integer, nullable=True)  # владелец для личных коллекций (избранное)
+    change_seq = Column(Integer, nullable=False, index=True)
+    deleted_at = Column(DateTime, default=datetime.utcnow)
 
 # ==================== PYDANTIC МОДЕЛИ ====================
 
@@ -200,6 +435,30 @@ class FavoriteCreateRequest(BaseModel):
 class FavoriteCompanyCreateRequest(BaseModel):
     company_id: int
 
+class BatchPostItem(PostCreateRequest):
+    company_id: Optional[int] = None
+    image_url: Optional[str] = None
+    user_id: Optional[int] = None  # автор; по умолчанию user_id из запроса
+
+class BatchCompanyItem(CompanyCreateRequest):
+    logo_url: Optional[str] = None
+    user_id: Optional[int] = None
+
+class BatchCommentItem(CommentCreateRequest):
+    post_id: int
+    user_id: Optional[int] = None
+
+class CompanyUpsertRequest(BaseModel):
+    description: str
+    industry: str
+    location: str
+    logo_url: Optional[str] = None
+    employee_count: int
+    contact_email: str
+
+class BatchRequest(BaseModel):
+    items: List[Dict[str, Any]]
+
 class AdminResetRequest(BaseModel):
     drop_users: bool = False
     drop_cards: bool = False
@@ -208,42 +467,931 @@ class AdminResetRequest(BaseModel):
     drop_favorites: bool = True
     drop_subscriptions: bool = True
 
+# ==================== МОДЕЛИ ОТВЕТОВ ====================
+
+# С response_model FastAPI сериализует ответ сразу в JSON-байты ядром Pydantic
+# (pydantic-core), минуя jsonable_encoder и json.dumps; datetime пишется нативно.
+# Эндпоинты по-прежнему возвращают словари — модель описывает и проверяет форму.
+class UserOut(BaseModel):
+    id: int
+    email: Optional[str] = None
+    name: Optional[str] = None
+    phone: Optional[str] = None
+    position: Optional[str] = None
+    company_name: Optional[str] = None
+    avatar_url: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+class CompanyOut(BaseModel):
+    id: int
+    name: Optional[str] = None
+    description: Optional[str] = None
+    industry: Optional[str] = None
+    location: Optional[str] = None
+    logo_url: Optional[str] = None
+    employee_count: Optional[int] = None
+    contact_email: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+class CompanyPage(BaseModel):
+    items: List[CompanyOut]
+    next_cursor: Optional[str] = None
+
+class FacetValue(BaseModel):
+    value: str
+    count: int
+
+class CompanyFacets(BaseModel):
+    industries: List[FacetValue]
+    locations: List[FacetValue]
+
+class AuthorSummary(BaseModel):
+    id: int
+    name: Optional[str] = None
+    position: Optional[str] = None
+    company_name: Optional[str] = None
+    avatar_url: Optional[str] = None
+
+class CompanySummary(BaseModel):
+    id: int
+    name: Optional[str] = None
+    industry: Optional[str] = None
+    location: Optional[str] = None
+    logo_url: Optional[str] = None
+
+class CommentOut(BaseModel):
+    id: int
+    post_id: Optional[int] = None
+    user_id: Optional[int] = None
+    content: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+class CommentPage(BaseModel):
+    items: List[CommentOut]
+    next_cursor: Optional[str] = None
+
+class PostOut(BaseModel):
+    id: int
+    user_id: Optional[int] = None
+    company_id: Optional[int] = None
+    content: Optional[str] = None
+    image_url: Optional[str] = None
+    likes_count: Optional[int] = None
+    comments_count: Optional[int] = None
+    liked_by_me: bool = False
+    created_at: Optional[datetime] = None
+    # Только при expand=...; без него поля в ответ не попадают (response_model_exclude_unset)
+    author: Optional[AuthorSummary] = None
+    company: Optional[CompanySummary] = None
+    latest_comments: Optional[List[CommentOut]] = None
+
+class PostPage(BaseModel):
+    items: List[PostOut]
+    next_cursor: Optional[str] = None
+
+class BusinessCardOut(BaseModel):
+    id: int
+    user_id: Optional[int] = None
+    name: Optional[str] = None
+    position: Optional[str] = None
+    company_name: Optional[str] = None
+    phone: Optional[str] = None
+    email: Optional[str] = None
+    social_media_link: Optional[str] = None
+    qr_code_data: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+class SyncChanges(BaseModel):
+    upserted: List[Dict[str, Any]]
+    deleted: List[int]
+
+class SyncResponse(BaseModel):
+    changes: Dict[str, SyncChanges]
+    next_since: str
+    has_more: bool
+
+# ==================== ПАГИНАЦИЯ ====================
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+def encode_cursor(*values):
+    """Упаковывает ключ последней записи страницы в непрозрачный курсор"""
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor: str):
+    """Распаковывает курсор, созданный encode_cursor"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw.decode('utf-8'))
+        if not isinstance(values, list):
+            raise ValueError(cursor)
+        return values
+    except ValueError:
+        raise HTTPException(status_code=400, detail='Некорректный курсор')
+
+def decode_datetime_cursor(cursor: str):
+    """Курсор вида (created_at, id) для лент, отсортированных по времени"""
+    values = decode_cursor(cursor)
+    try:
+        created_at, row_id = values
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail='Некорректный курсор')
+
+# ==================== ПОЛНОТЕКСТОВЫЙ ПОИСК ====================
+
+# SQLite: внешние FTS5-индексы companies_fts и posts_fts, которые держат в актуальном
+# состоянии триггеры (см. migrations/versions/0001_initial.py). unicode61 приводит
+# кириллицу к нижнему регистру, ё сворачивается в е, а префиксный поиск ("банк*")
+# заменяет отсутствующий в FTS5 русский стемминг.
+# PostgreSQL: GIN-индексы ix_companies_search и ix_posts_search по tsvector
+# с конфигурацией 'russian' (со стеммингом).
+
+def fts_match_query(q: str):
+    """Превращает пользовательский ввод в безопасный запрос: каждое слово ищется по префиксу"""
+    q = q or ''
+    if IS_SQLITE:
+        q = q.replace('ё', 'е').replace('Ё', 'Е')
+    words = re.findall(r'\w+', q)
+    if not words:
+        return None
+    if IS_SQLITE:
+        return ' '.join(f'"{word}"*' for word in words)
+    return ' & '.join(f'{word}:*' for word in words)
+
+def company_match_ids(match: str):
+    """Подзапрос id компаний, подходящих под запрос fts_match_query"""
+    if IS_SQLITE:
+        sql = 'SELECT rowid FROM companies_fts WHERE companies_fts MATCH :match'
+    else:
+        sql = f"SELECT id FROM companies WHERE {PG_COMPANY_SEARCH_VECTOR} @@ to_tsquery('russian', :match)"
+    return text(sql).bindparams(match=match)
+
+# Результаты: чем меньше rank, тем релевантнее (как у bm25 в SQLite)
+if IS_SQLITE:
+    # Совпадение в названии весит больше, чем в отрасли и описании
+    SEARCH_COMPANIES_SQL = """
+        SELECT c.id, c.name, c.industry, c.location, c.logo_url,
+               snippet(companies_fts, -1, '<b>', '</b>', '…', 12) AS snippet,
+               bm25(companies_fts, 10.0, 1.0, 4.0) AS rank
+        FROM companies_fts
+        JOIN companies c ON c.id = companies_fts.rowid
+        WHERE companies_fts MATCH :match
+        ORDER BY rank
+        LIMIT :limit
+    """
+    SEARCH_POSTS_SQL = """
+        SELECT p.id, p.user_id, p.company_id, p.created_at,
+               snippet(posts_fts, 0, '<b>', '</b>', '…', 16) AS snippet,
+               bm25(posts_fts) AS rank
+        FROM posts_fts
+        JOIN posts p ON p.id = posts_fts.rowid
+        WHERE posts_fts MATCH :match
+        ORDER BY rank
+        LIMIT :limit
+    """
+else:
+    PG_HEADLINE_OPTIONS = "'StartSel=<b>, StopSel=</b>, MaxWords=16, MinWords=6'"
+    SEARCH_COMPANIES_SQL = f"""
+        SELECT id, name, industry, location, logo_url,
+               ts_headline('russian', coalesce(description, ''), query, {PG_HEADLINE_OPTIONS}) AS snippet,
+               -ts_rank({PG_COMPANY_SEARCH_VECTOR}, query) AS rank
+        FROM companies, to_tsquery('russian', :match) AS query
+        WHERE {PG_COMPANY_SEARCH_VECTOR} @@ query
+        ORDER BY rank
+        LIMIT :limit
+    """
+    SEARCH_POSTS_SQL = f"""
+        SELECT id, user_id, company_id, created_at,
+               ts_headline('russian', coalesce(content, ''), query, {PG_HEADLINE_OPTIONS}) AS snippet,
+               -ts_rank({PG_POST_SEARCH_VECTOR}, query) AS rank
+        FROM posts, to_tsquery('russian', :match) AS query
+        WHERE {PG_POST_SEARCH_VECTOR} @@ query
+        ORDER BY rank
+        LIMIT :limit
+    """
+
+# ==================== КЭШ ОТВЕТОВ ====================
+
+# Каталог, профили и визитки читают намного чаще, чем меняют. Готовые ответы
+# держим в памяти процесса: LRU на RESPONSE_CACHE_SIZE записей, каждая живёт
+# не дольше RESPONSE_CACHE_TTL секунд. Запись в базу явно сбрасывает
+# затронутые ключи; TTL ограничивает устаревание, если экземпляров API несколько.
+RESPONSE_CACHE_SIZE = int(os.environ.get('RESPONSE_CACHE_SIZE', '1024'))
+RESPONSE_CACHE_TTL = float(os.environ.get('RESPONSE_CACHE_TTL', '60'))
+
+class ResponseCache:
+    """LRU + TTL кэш ответов; ключ — кортеж (пространство, параметры...)"""
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._generations = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._invalidations = 0
+
+    def _generation(self, key):
+        # Счётчик на пространство, а не на ключ: словарь не растёт с числом пользователей и визиток.
+        # Цена — загрузка, начатая до сброса соседнего ключа того же пространства, не попадёт в кэш
+        return (self._epoch, self._generations.get(key[0], 0))
+
+    def get(self, key):
+        """Возвращает (найдено, значение)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return True, value
+                del self._entries[key]
+                self._expirations += 1
+            self._misses += 1
+            return False, None
+
+    def set(self, key, value, generation=None):
+        with self._lock:
+            # Если пока считали ответ, ключ успели сбросить, результат мог устареть — не кэшируем
+            if generation is not None and generation != self._generation(key):
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    async def get_or_load(self, key, loader):
+        found, value = self.get(key)
+        if found:
+            return value
+        with self._lock:
+            generation = self._generation(key)
+        value = await loader()
+        self.set(key, value, generation)
+        return value
+
+    def invalidate(self, namespace: str, *params):
+        """Сбрасывает один ключ (namespace, *params) или всё пространство, если параметров нет"""
+        with self._lock:
+            self._generations[namespace] = self._generations.get(namespace, 0) + 1
+            if params:
+                dropped = 1 if self._entries.pop((namespace, *params), None) is not None else 0
+            else:
+                stale = [key for key in self._entries if key[0] == namespace]
+                for key in stale:
+                    del self._entries[key]
+                dropped = len(stale)
+            self._invalidations += dropped
+
+    def clear(self):
+        with self._lock:
+            self._epoch += 1
+            self._invalidations += len(self._entries)
+            self._entries.clear()
+
+    def metrics(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl,
+                'hits_total': self._hits,
+                'misses_total': self._misses,
+                'hit_ratio': round(self._hits / lookups, 3) if lookups else 0.0,
+                'evictions_total': self._evictions,
+                'expirations_total': self._expirations,
+                'invalidations_total': self._invalidations,
+            }
+
+response_cache = ResponseCache(RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL)
+
+# ==================== ФАСЕТЫ КАТАЛОГА ====================
+
+# Отрасли и города с количеством компаний живут в кэше ответов
+# вместе со страницами каталога и сбрасываются при любой записи в companies.
+async def _count_by(db: AsyncSession, column):
+    rows = await db.execute(
+        select(column, func.count(Company.id))
+        .where(column.isnot(None), column != '')
+        .group_by(column)
+        .order_by(column)
+    )
+    return [{'value': value, 'count': count} for value, count in rows]
+
+async def get_company_facets(db: AsyncSession):
+    async def load():
+        return {
+            'industries': await _count_by(db, Company.industry),
+            'locations': await _count_by(db, Company.location),
+        }
+    return await response_cache.get_or_load(('companies', 'facets'), load)
+
+# ==================== СЖАТИЕ ОТВЕТОВ ====================
+
+# Ответы каталога и ленты — большой JSON с русским текстом, сжимается в разы.
+# Кодировка выбирается по Accept-Encoding (br, если установлен brotli, иначе gzip);
+# ответы меньше COMPRESSION_MIN_SIZE байт не сжимаются. Сжатые байты GET-ответов
+# хранятся в compressed_cache по хэшу тела, поэтому повторная отдача одного
+# и того же ответа (кэш ответов, неизменный каталог) не сжимает его заново.
+COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', '1') == '1'
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', '1024'))
+COMPRESSION_GZIP_LEVEL = int(os.environ.get('COMPRESSION_GZIP_LEVEL', '6'))
+COMPRESSION_BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', '5'))
+COMPRESSION_CACHE_SIZE = int(os.environ.get('COMPRESSION_CACHE_SIZE', '256'))
+COMPRESSIBLE_TYPES = ('application/json', 'application/x-ndjson', 'text/')
+
+compressed_cache = ResponseCache(COMPRESSION_CACHE_SIZE, RESPONSE_CACHE_TTL)
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """br или gzip по Accept-Encoding с учётом q; None — отдаём без сжатия"""
+    weights = {}
+    for part in accept_encoding.lower().split(','):
+        name, _, params = part.strip().partition(';')
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            weights[name.strip()] = q
+    candidates = ['br', 'gzip'] if brotli is not None else ['gzip']
+    best, best_q = None, 0.0
+    for encoding in candidates:
+        q = weights.get(encoding, weights.get('*', 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+def _gzip_compressor():
+    # wbits=31 — формат gzip (заголовок и CRC), а не голый deflate
+    return zlib.compressobj(COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+
+def compress_body(body: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(body, quality=COMPRESSION_BROTLI_QUALITY)
+    compressor = _gzip_compressor()
+    return compressor.compress(body) + compressor.flush()
+
+class _StreamCompressor:
+    """Сжатие потокового ответа по кускам: каждый кусок уходит клиенту сразу"""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == 'br':
+            self._compressor = brotli.Compressor(quality=COMPRESSION_BROTLI_QUALITY)
+        else:
+            self._compressor = _gzip_compressor()
+
+    def chunk(self, data: bytes) -> bytes:
+        if self.encoding == 'br':
+            return self._compressor.process(data) + self._compressor.flush()
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == 'br':
+            return self._compressor.finish()
+        return self._compressor.flush()
+
+class CompressionMiddleware:
+    """ASGI-middleware: сжимает JSON/NDJSON/текстовые ответы выбранной кодировкой"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not COMPRESSION_ENABLED:
+            return await self.app(scope, receive, send)
+        encoding = negotiate_encoding(Headers(scope=scope).get('accept-encoding', ''))
+        cacheable = scope['method'] == 'GET'
+        start = None
+        mode = None  # None — ещё не решили, 'plain' — без сжатия, 'stream' — сжимаем по кускам
+        stream = None
+
+        async def send_compressed(message):
+            nonlocal start, mode, stream
+            if message['type'] == 'http.response.start':
+                start = message
+                return
+            if message['type'] != 'http.response.body':
+                await send(message)
+                return
+
+            body = message.get('body', b'')
+            more_body = message.get('more_body', False)
+
+            if mode is None:
+                headers = MutableHeaders(raw=start['headers'])
+                content_type = headers.get('content-type', '')
+                compressible = (
+                    'content-encoding' not in headers
+                    and content_type.startswith(COMPRESSIBLE_TYPES)
+                    and start['status'] not in (204, 304)
+                )
+                if compressible:
+                    headers.add_vary_header('Accept-Encoding')
+                if not compressible or encoding is None or (not more_body and len(body) < COMPRESSION_MIN_SIZE):
+                    mode = 'plain'
+                    await send(start)
+                    await send(message)
+                    return
+
+                headers['Content-Encoding'] = encoding
+                if not more_body:
+                    # Ответ целиком: берём сжатые байты из кэша или сжимаем и кладём туда
+                    if cacheable and start['status'] == 200:
+                        key = (encoding, hashlib.blake2b(body, digest_size=16).digest())
+                        found, compressed = compressed_cache.get(key)
+                        if not found:
+                            compressed = compress_body(body, encoding)
+                            compressed_cache.set(key, compressed)
+                    else:
+                        compressed = compress_body(body, encoding)
+                    headers['Content-Length'] = str(len(compressed))
+                    mode = 'plain'
+                    await send(start)
+                    await send({'type': 'http.response.body', 'body': compressed})
+                    return
+
+                # Потоковый ответ: длина заранее неизвестна
+                del headers['Content-Length']
+                mode = 'stream'
+                stream = _StreamCompressor(encoding)
+                await send(start)
+
+            if mode == 'plain':
+                await send(message)
+                return
+
+            data = stream.chunk(body) if body else b''
+            if not more_body:
+                data += stream.finish()
+            await send({'type': 'http.response.body', 'body': data, 'more_body': more_body})
+
+        await self.app(scope, receive, send_compressed)
+
+app.add_middleware(CompressionMiddleware)
+
+# ==================== ХЭШИРОВАНИЕ ПАРОЛЕЙ ====================
+
+# bcrypt намеренно медленный (100–300 мс на операцию), поэтому хэширование
+# и проверка паролей идут в отдельном небольшом пуле потоков, а не в event loop:
+# всплеск логинов не должен останавливать ленту и каталог.
+# pyca/bcrypt отпускает GIL на время вычисления, так что потоков достаточно.
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', '4'))
+PASSWORD_HASH_QUEUE_LIMIT = int(os.environ.get('PASSWORD_HASH_QUEUE_LIMIT', '64'))
+
+class PasswordHasher:
+    """Ограниченный пул для bcrypt с отказом (503) при переполнении очереди"""
+
+    def __init__(self, workers: int, queue_limit: int):
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bcrypt')
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._running = 0
+        self._rejected = 0
+
+    def _run(self, fn, args):
+        with self._lock:
+            self._running += 1
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self._running -= 1
+
+    async def _submit(self, fn, *args):
+        with self._lock:
+            if self._in_flight >= self.workers + self.queue_limit:
+                self._rejected += 1
+                raise HTTPException(
+                    status_code=503,
+                    detail='Сервер перегружен, повторите попытку позже',
+                    headers={'Retry-After': '1'},
+                )
+            self._in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, self._run, fn, args)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._submit(bcrypt.hash, password)
+
+    async def verify(self, password: str, password_hash: str) -> bool:
+        return await self._submit(bcrypt.verify, password, password_hash)
+
+    def metrics(self):
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'queue_limit': self.queue_limit,
+                'running': self._running,
+                'queue_depth': self._in_flight - self._running,
+                'rejected_total': self._rejected,
+            }
+
+password_hasher = PasswordHasher(PASSWORD_HASH_WORKERS, PASSWORD_HASH_QUEUE_LIMIT)
+
+# ==================== БУФЕР ЛАЙКОВ ====================
+
+# На вирусном посте лайки идут сотнями в секунду, и транзакция на каждый
+# сериализует запись (в SQLite писатель один). Буфер подтверждает лайк сразу,
+# а в базу пишет пачкой раз в LIKE_BUFFER_FLUSH_MS: один INSERT ... ON CONFLICT
+# DO NOTHING на всю пачку и один UPDATE счётчика на каждый пост.
+# Очередь не длиннее LIKE_BUFFER_MAX_SIZE: если сбросы не успевают или база
+# недоступна, новые лайки пишутся в базу сразу, мимо буфера.
+# При остановке приложения буфер дописывается до конца (см. lifespan), с повторами.
+LIKE_BUFFER_ENABLED = os.environ.get('LIKE_BUFFER_ENABLED', '1') == '1'
+LIKE_BUFFER_FLUSH_MS = int(os.environ.get('LIKE_BUFFER_FLUSH_MS', '200'))
+LIKE_BUFFER_MAX_SIZE = int(os.environ.get('LIKE_BUFFER_MAX_SIZE', '5000'))
+LIKE_BUFFER_STOP_RETRIES = 5
+
+logger = logging.getLogger(__name__)
+
+class LikeBuffer:
+    """Write-behind буфер лайков с периодическим сбросом пачками"""
+
+    def __init__(self, flush_ms: int, max_size: int):
+        self.flush_interval = flush_ms / 1000
+        self.max_size = max_size
+        # (post_id, user_id) -> created_at; живёт только в event loop, блокировки не нужны
+        self._pending = {}
+        self._flushing = {}
+        self._flush_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self._stopping = False
+        self._flushes = 0
+        self._flushed_likes = 0
+        self._flush_errors = 0
+        # Лайки, записанные мимо переполненной очереди
+        self.bypassed = 0
+        # Растёт при каждом изменении очереди: входит в ETag ленты, пока буфер не пуст
+        self.changes = 0
+        self._last_flush_ms = 0.0
+        self._max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+
+    def start(self):
+        # Примитивы asyncio привязываются к циклу событий — создаём их в нём
+        self._flush_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            # Флагом, а не cancel(): wait_for в Python 3.11 теряет отмену,
+            # если событие пришло одновременно с ней, и остановка зависает
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        # Финальный сброс: всё, что подтверждено клиентам, должно попасть в базу.
+        # База могла отвалиться ненадолго — повторяем с паузой
+        attempts = 0
+        while self._pending:
+            if await self.flush():
+                continue
+            attempts += 1
+            if attempts >= LIKE_BUFFER_STOP_RETRIES:
+                # Последний шанс восстановить лайки — по журналу
+                logger.error(
+                    'Буфер лайков: %d лайков не записаны в базу (post_id, user_id, created_at): %s',
+                    len(self._pending),
+                    [(post_id, user_id, created_at.isoformat()) for (post_id, user_id), created_at in self._pending.items()],
+                )
+                break
+            await asyncio.sleep(0.5 * attempts)
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if self._stopping:
+                return
+            await self.flush()
+
+    def is_pending(self, post_id: int, user_id: int) -> bool:
+        key = (post_id, user_id)
+        return key in self._pending or key in self._flushing
+
+    def is_full(self) -> bool:
+        return len(self._pending) >= self.max_size
+
+    def add(self, post_id: int, user_id: int) -> bool:
+        """Ставит лайк в очередь; False — такой лайк уже ждёт записи"""
+        if self.is_pending(post_id, user_id):
+            return False
+        self._pending[(post_id, user_id)] = datetime.utcnow()
+        self.changes += 1
+        if self.is_full():
+            self._wakeup.set()
+        return True
+
+    async def discard(self, post_id: int, user_id: int) -> bool:
+        """Снимает лайк из очереди; False — в буфере его нет (ищите в базе)"""
+        if self._pending.pop((post_id, user_id), None) is not None:
+            self.changes += 1
+            return True
+        if (post_id, user_id) in self._flushing:
+            # Лайк прямо сейчас пишется в базу — дожидаемся конца сброса
+            async with self._flush_lock:
+                pass
+        return False
+
+    def liked_by(self, user_id: int, post_ids) -> set:
+        return {
+            post_id for post_id in post_ids
+            if (post_id, user_id) in self._pending or (post_id, user_id) in self._flushing
+        }
+
+    def pending_counts(self, post_ids) -> dict:
+        wanted = set(post_ids)
+        counts = {}
+        for source in (self._pending, self._flushing):
+            for post_id, _ in source:
+                if post_id in wanted:
+                    counts[post_id] = counts.get(post_id, 0) + 1
+        return counts
+
+    def clear(self):
+        self._pending.clear()
+        self.changes += 1
+
+    def etag_component(self):
+        """None, когда буфер пуст: тогда лента целиком описывается версиями в базе"""
+        if not self._pending and not self._flushing:
+            return None
+        return f'likes:{id(self)}:{self.changes}'
+
+    async def flush(self) -> bool:
+        async with self._flush_lock:
+            if not self._pending:
+                return True
+            self._flushing, self._pending = self._pending, {}
+            started = time.perf_counter()
+            try:
+                async with AsyncSessionLocal() as db:
+                    await self._write(db, self._flushing)
+            except Exception:
+                # База недоступна — возвращаем пачку в очередь, повторим на следующем тике
+                self._flush_errors += 1
+                self._flushing.update(self._pending)
+                self._pending = self._flushing
+                return False
+            finally:
+                self._flushing = {}
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self._flushes += 1
+            self._last_flush_ms = elapsed_ms
+            self._max_flush_ms = max(self._max_flush_ms, elapsed_ms)
+            self._total_flush_ms += elapsed_ms
+            return True
+
+    async def _write(self, db: AsyncSession, batch: dict):
+        # Посты могли удалить, пока лайки ждали в буфере
+        post_ids = {post_id for post_id, _ in batch}
+        existing = set((await db.execute(select(Post.id).where(Post.id.in_(post_ids)))).scalars())
+        rows = [
+            {'post_id': post_id, 'user_id': user_id, 'created_at': created_at}
+            for (post_id, user_id), created_at in batch.items()
+            if post_id in existing
+        ]
+        if not rows:
+            return
+
+        # RETURNING отдаёт только реально вставленные строки — по ним и считаем
+        inserted = await db.execute(
+            dialect_insert(Like)
+            .on_conflict_do_nothing(index_elements=['post_id', 'user_id'])
+            .returning(Like.post_id),
+            rows,
+        )
+        per_post = {}
+        for post_id in inserted.scalars():
+            per_post[post_id] = per_post.get(post_id, 0) + 1
+
+        if per_post:
+            seq = await bump_versions(db, 'posts')
+        for post_id, count in per_post.items():
+            await db.execute(
+                update(Post)
+                .where(Post.id == post_id)
+                .values(likes_count=func.coalesce(Post.likes_count, 0) + count, change_seq=seq)
+            )
+        await db.commit()
+        self._flushed_likes += sum(per_post.values())
+
+    def metrics(self):
+        return {
+            'enabled': LIKE_BUFFER_ENABLED,
+            'flush_interval_ms': int(self.flush_interval * 1000),
+            'max_size': self.max_size,
+            'depth': len(self._pending) + len(self._flushing),
+            'flushes_total': self._flushes,
+            'flushed_likes_total': self._flushed_likes,
+            'flush_errors_total': self._flush_errors,
+            'bypassed_total': self.bypassed,
+            'last_flush_ms': round(self._last_flush_ms, 2),
+            'max_flush_ms': round(self._max_flush_ms, 2),
+            'avg_flush_ms': round(self._total_flush_ms / self._flushes, 2) if self._flushes else 0.0,
+        }
+
+like_buffer = LikeBuffer(LIKE_BUFFER_FLUSH_MS, LIKE_BUFFER_MAX_SIZE)
+
+# ==================== УСЛОВНЫЕ ЗАПРОСЫ (ETag) ====================
+
+# Каждая запись увеличивает версию затронутых коллекций в data_versions в той же
+# транзакции. ETag списка — хэш URL и версий коллекций, из которых он собран,
+# поэтому одинаков на всех экземплярах API и переживает перезапуск. Если клиент
+# прислал актуальный If-None-Match, отвечаем 304 до запроса данных и сериализации.
+#
+# Вместе с версиями коллекций растёт общий счётчик CHANGE_SEQ: его новое значение
+# записывается в change_seq изменённых строк и служит токеном для /sync.
+# Строка счётчика блокируется до конца транзакции, поэтому номера изменений
+# становятся видны строго по возрастанию.
+CHANGE_SEQ = 'changes'
+
+async def bump_versions(db: AsyncSession, *names: str) -> int:
+    """Увеличивает версии коллекций и возвращает номер изменения для change_seq"""
+    now = datetime.utcnow()
+    stmt = dialect_insert(DataVersion).values([
+        {'name': name, 'version': 1, 'updated_at': now} for name in (*names, CHANGE_SEQ)
+    ])
+    rows = await db.execute(stmt.on_conflict_do_update(
+        index_elements=['name'],
+        set_={'version': DataVersion.version + 1, 'updated_at': stmt.excluded.updated_at},
+    ).returning(DataVersion.name, DataVersion.version))
+    return dict(rows.all())[CHANGE_SEQ]
+
+def _etag_matches(header: str, etag: str) -> bool:
+    # Слабое сравнение (RFC 9110): W/ не учитываем
+    if header.strip() == '*':
+        return True
+    tags = [tag.strip() for tag in header.split(',')]
+    return etag.removeprefix('W/') in {tag.removeprefix('W/') for tag in tags}
+
+async def check_not_modified(request: Request, response: Response, db: AsyncSession, names, extra=None):
+    """Возвращает ответ 304, если версия у клиента актуальна, иначе ставит ETag/Last-Modified в response"""
+    rows = (await db.execute(
+        select(DataVersion.name, DataVersion.version, DataVersion.updated_at)
+        .where(DataVersion.name.in_(names))
+    )).all()
+    versions = {name: (version, updated_at) for name, version, updated_at in rows}
+
+    fingerprint = '|'.join(
+        [request.url.path, request.url.query]
+        + [f'{name}:{versions.get(name, (0, None))[0]}' for name in sorted(names)]
+        + ([str(extra)] if extra is not None else [])
+    )
+    headers = {
+        'ETag': 'W/"%s"' % hashlib.sha1(fingerprint.encode()).hexdigest()[:20],
+        'Cache-Control': 'no-cache',
+    }
+    updated = [updated_at for _, updated_at in versions.values() if updated_at is not None]
+    last_modified = max(updated).replace(microsecond=0, tzinfo=timezone.utc) if updated else None
+    if last_modified is not None:
+        headers['Last-Modified'] = format_datetime(last_modified, usegmt=True)
+
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match is not None:
+        if _etag_matches(if_none_match, headers['ETag']):
+            return Response(status_code=304, headers=headers)
+    elif last_modified is not None and extra is None:
+        # If-Modified-Since точен лишь до секунды, поэтому только когда нет If-None-Match
+        if_modified_since = request.headers.get('if-modified-since')
+        try:
+            since = parsedate_to_datetime(if_modified_since) if if_modified_since else None
+        except (TypeError, ValueError):
+            since = None
+        if since is not None and last_modified <= since:
+            return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return None
+
+# ==================== ЕСТЕСТВЕННЫЕ КЛЮЧИ (UPSERT) ====================
+
+# Импорт должен быть идемпотентным без выгрузки всей таблицы на клиент:
+# компания определяется нормализованным названием, импортированный пост —
+# хэшем (company_id, content). Оба ключа закреплены уникальными индексами,
+# повторы разрешает INSERT ... ON CONFLICT в самой БД.
+
+def company_name_key(name: str) -> str:
+    """Название без учёта регистра и лишних пробелов: «  Open  AI » и «open ai» — одна компания"""
+    return ' '.join(name.split()).casefold()
+
+def post_content_hash(company_id: Optional[int], content: str) -> str:
+    """sha256 от "<company_id>\\n<content>" (пустой company_id — пустая строка), hex"""
+    return hashlib.sha256(f'{company_id or ""}\n{content}'.encode('utf-8')).hexdigest()
+
+async def upsert_by_key(db: AsyncSession, model, key: str, rows: List[dict], update_columns=()):
+    """
+    Вставляет строки с ON CONFLICT по уникальному ключу key и возвращает два словаря
+    {ключ: id}: записанные (вставленные или изменённые) и уже существовавшие без изменений.
+    Без update_columns существующие строки не трогаются (DO NOTHING); с ними обновляются
+    только строки, где хотя бы одно из полей отличается, — повторный импорт ничего не пишет.
+    """
+    if not rows:
+        return {}, {}
+    key_column = getattr(model, key)
+    stmt = dialect_insert(model)
+    if update_columns:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[key],
+            set_={column: stmt.excluded[column] for column in (*update_columns, 'change_seq', 'updated_at')},
+            where=or_(*(getattr(model, column).is_distinct_from(stmt.excluded[column]) for column in update_columns)),
+        )
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=[key])
+    written = dict((await db.execute(stmt.returning(key_column, model.id), rows)).all())
+
+    # Id строк, которые ON CONFLICT пропустил, — одним запросом по индексу ключа
+    skipped = [row[key] for row in rows if row[key] not in written]
+    existing = {}
+    if skipped:
+        existing = dict((await db.execute(select(key_column, model.id).where(key_column.in_(skipped)))).all())
+    return written, existing
+
+def company_row(req, user_id: int, seq: int, name: Optional[str] = None) -> dict:
+    name = name if name is not None else req.name
+    return {
+        'name': name,
+        'name_key': company_name_key(name),
+        'description': req.description,
+        'industry': req.industry,
+        'location': req.location,
+        # URL clearbit, домен или пустое значение заменяются локальным логотипом из манифеста
+        'logo_url': get_logo_manifest().resolve(name, req.logo_url),
+        'employee_count': req.employee_count,
+        'contact_email': req.contact_email,
+        'created_by': user_id,
+        'change_seq': seq,
+    }
+
+COMPANY_UPSERT_COLUMNS = ('description', 'industry', 'location', 'logo_url', 'employee_count', 'contact_email')
+POST_UPSERT_COLUMNS = ('image_url',)
+
 # ==================== API ЭНДПОИНТЫ ====================
 
 @app.post('/register')
-def register(req: RegisterRequest):
-    db = SessionLocal()
-    if db.query(User).filter(User.email == req.email).first():
+async def register(req: RegisterRequest, db: AsyncSession = Depends(get_db)):
+    existing = await db.execute(select(User.id).where(User.email == req.email))
+    if existing.first():
         raise HTTPException(status_code=400, detail='Пользователь уже существует')
-    
+    # Возвращаем соединение в пул на время bcrypt, чтобы не держать его сотни миллисекунд
+    await db.commit()
+
     user = User(
-        email=req.email, 
-        password_hash=bcrypt.hash(req.password),
+        email=req.email,
+        password_hash=await password_hasher.hash(req.password),
         name=req.name,
         phone=req.phone,
         position=req.position,
         company_name=req.company_name
     )
     db.add(user)
-    db.commit()
-    db.refresh(user)
-    db.close()
+    try:
+        await db.commit()
+    except IntegrityError:
+        # Параллельная регистрация с тем же email успела раньше
+        await db.rollback()
+        raise HTTPException(status_code=400, detail='Пользователь уже существует')
     return {'message': 'Пользователь зарегистрирован', 'user_id': user.id}
 
 @app.post('/login')
-def login(req: LoginRequest):
-    db = SessionLocal()
-    user = db.query(User).filter(User.email == req.email).first()
-    db.close()
-    if not user or not bcrypt.verify(req.password, user.password_hash):
+async def login(req: LoginRequest, db: AsyncSession = Depends(get_db)):
+    result = await db.execute(select(User.id, User.password_hash).where(User.email == req.email))
+    credentials = result.first()
+    await db.commit()
+    if not credentials or not await password_hasher.verify(req.password, credentials.password_hash):
         raise HTTPException(status_code=401, detail='Неверный email или пароль')
-    return {'message': 'Успешный вход', 'user_id': user.id}
+    return {'message': 'Успешный вход', 'user_id': credentials.id}
 
-@app.get('/users')
-def get_users():
-    db = SessionLocal()
-    users = db.query(User).all()
-    db.close()
+@app.get('/users', response_model=List[UserOut])
+async def get_users(db: AsyncSession = Depends(get_db)):
+    users = (await db.execute(select(User))).scalars().all()
     return [
         {
             'id': user.id,
@@ -258,36 +1406,34 @@ def get_users():
         for user in users
     ]
 
-@app.get('/users/{user_id}')
-def get_user(user_id: int):
-    db = SessionLocal()
-    user = db.query(User).filter(User.id == user_id).first()
-    db.close()
-    if not user:
-        raise HTTPException(status_code=404, detail='Пользователь не найден')
-    return {
-        'id': user.id,
-        'email': user.email,
-        'name': user.name,
-        'phone': user.phone,
-        'position': user.position,
-        'company_name': user.company_name,
-        'avatar_url': user.avatar_url,
-        'created_at': user.created_at
-    }
+@app.get('/users/{user_id}', response_model=UserOut)
+async def get_user(user_id: int, db: AsyncSession = Depends(get_db)):
+    async def load():
+        user = await db.get(User, user_id)
+        if not user:
+            raise HTTPException(status_code=404, detail='Пользователь не найден')
+        return {
+            'id': user.id,
+            'email': user.email,
+            'name': user.name,
+            'phone': user.phone,
+            'position': user.position,
+            'company_name': user.company_name,
+            'avatar_url': user.avatar_url,
+            'created_at': user.created_at
+        }
+    return await response_cache.get_or_load(('user', user_id), load)
 
 @app.put('/users/{user_id}')
-def update_user(user_id: int, req: UserUpdateRequest):
-    db = SessionLocal()
-    user = db.query(User).filter(User.id == user_id).first()
+async def update_user(user_id: int, req: UserUpdateRequest, db: AsyncSession = Depends(get_db)):
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail='Пользователь не найден')
-    
+
     if req.email is not None:
         # Проверим, что такой email не занят другим пользователем
-        existing = db.query(User).filter(User.email == req.email, User.id != user_id).first()
-        if existing:
-            db.close()
+        existing = await db.execute(select(User.id).where(User.email == req.email, User.id != user_id))
+        if existing.first():
             raise HTTPException(status_code=400, detail='Email уже используется')
         user.email = req.email
 
@@ -301,37 +1447,134 @@ def update_user(user_id: int, req: UserUpdateRequest):
         user.company_name = req.company_name
     if req.avatar_url is not None:
         user.avatar_url = req.avatar_url
-    
-    db.commit()
-    db.close()
+
+    await bump_versions(db, 'users')
+    await db.commit()
+    response_cache.invalidate('user', user_id)
     return {'message': 'Пользователь обновлен'}
 
 @app.post('/companies')
-def create_company(req: CompanyCreateRequest, user_id: int):
-    db = SessionLocal()
-    company = Company(
-        name=req.name,
-        description=req.description,
-        industry=req.industry,
-        location=req.location,
-        logo_url=req.logo_url,
-        employee_count=req.employee_count,
-        contact_email=req.contact_email,
-        created_by=user_id
+async def create_company(req: CompanyCreateRequest, user_id: int, db: AsyncSession = Depends(get_db)):
+    seq = await bump_versions(db, 'companies')
+    written, _ = await upsert_by_key(db, Company, 'name_key', [company_row(req, user_id, seq)])
+    if not written:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail='Компания с таким названием уже существует')
+    await db.commit()
+    response_cache.invalidate('companies')
+    return {'message': 'Компания создана', 'company_id': next(iter(written.values()))}
+
+@app.put('/companies/by-name/{name}')
+async def upsert_company(name: str, req: CompanyUpsertRequest, user_id: int, db: AsyncSession = Depends(get_db)):
+    """Создаёт компанию или обновляет существующую с тем же названием (без учёта регистра)"""
+    seq = await bump_versions(db, 'companies')
+    written, existing = await upsert_by_key(
+        db, Company, 'name_key', [company_row(req, user_id, seq, name=name)], COMPANY_UPSERT_COLUMNS
     )
-    db.add(company)
-    db.commit()
-    db.refresh(company)
-    db.close()
-    return {'message': 'Компания создана', 'company_id': company.id}
-
-@app.get('/companies')
-def get_companies():
-    db = SessionLocal()
-    companies = db.query(Company).all()
-    db.close()
-    return [
-        {
+    if not written:
+        # Данные не изменились — не сдвигаем версии каталога и не сбрасываем кэш
+        await db.rollback()
+        return {'message': 'Компания не изменилась', 'company_id': next(iter(existing.values()))}
+    await db.commit()
+    response_cache.invalidate('companies')
+    response_cache.invalidate('company')
+    return {'message': 'Компания сохранена', 'company_id': next(iter(written.values()))}
+
+@app.get('/companies', response_model=CompanyPage)
+async def get_companies(
+    request: Request,
+    response: Response,
+    industry: Optional[str] = None,
+    location: Optional[str] = None,
+    q: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    sort: Literal['name', 'newest'] = 'name',
+    db: AsyncSession = Depends(get_db),
+):
+    not_modified = await check_not_modified(request, response, db, ['companies'])
+    if not_modified:
+        return not_modified
+
+    async def load():
+        query = select(Company)
+        if industry:
+            query = query.where(Company.industry == industry)
+        if location:
+            query = query.where(Company.location == location)
+        if q:
+            match = fts_match_query(q)
+            if match is None:
+                return {'items': [], 'next_cursor': None}
+            query = query.where(Company.id.in_(company_match_ids(match)))
+
+        if sort == 'newest':
+            sort_column, descending = Company.created_at, True
+        else:
+            sort_column, descending = Company.name, False
+
+        if cursor:
+            # В курсор зашит режим сортировки: курсор от другой сортировки не подходит
+            values = decode_cursor(cursor)
+            try:
+                cursor_sort, sort_value, company_id = values
+                if cursor_sort != sort:
+                    raise ValueError(cursor_sort)
+                if sort == 'newest':
+                    sort_value = datetime.fromisoformat(sort_value)
+                company_id = int(company_id)
+            except (TypeError, ValueError):
+                raise HTTPException(status_code=400, detail='Некорректный курсор')
+            key = tuple_(sort_column, Company.id)
+            boundary = tuple_(sort_value, company_id)
+            query = query.where(key < boundary if descending else key > boundary)
+
+        if descending:
+            query = query.order_by(sort_column.desc(), Company.id.desc())
+        else:
+            query = query.order_by(sort_column.asc(), Company.id.asc())
+        companies = (await db.execute(query.limit(limit + 1))).scalars().all()
+
+        next_cursor = None
+        if len(companies) > limit:
+            companies = companies[:limit]
+            last = companies[-1]
+            next_cursor = encode_cursor(sort, last.created_at if sort == 'newest' else last.name, last.id)
+
+        return {
+            'items': [
+                {
+                    'id': company.id,
+                    'name': company.name,
+                    'description': company.description,
+                    'industry': company.industry,
+                    'location': company.location,
+                    'logo_url': company.logo_url,
+                    'employee_count': company.employee_count,
+                    'contact_email': company.contact_email,
+                    'created_at': company.created_at
+                }
+                for company in companies
+            ],
+            'next_cursor': next_cursor,
+        }
+    # ETag строится по общим data_versions: если версию сдвинул другой процесс (второй узел,
+    # load_companies.py), ключ сменится и тело не разойдётся с заголовком
+    cache_key = ('companies', response.headers.get('ETag'), industry, location, q, limit, cursor, sort)
+    return await response_cache.get_or_load(cache_key, load)
+
+@app.get('/companies/facets', response_model=CompanyFacets)
+async def get_companies_facets(db: AsyncSession = Depends(get_db)):
+    return await get_company_facets(db)
+
+@app.get('/companies/{company_id}', response_model=CompanyOut)
+async def get_company(company_id: int, db: AsyncSession = Depends(get_db)):
+    # 404 не кэшируется: исключение из load() не доходит до кэша
+    async def load():
+        company = await db.get(Company, company_id)
+        if not company:
+            raise HTTPException(status_code=404, detail='Компания не найдена')
+        return {
             'id': company.id,
             'name': company.name,
             'description': company.description,
@@ -342,125 +1585,349 @@ def get_companies():
             'contact_email': company.contact_email,
             'created_at': company.created_at
         }
-        for company in companies
-    ]
+    return await response_cache.get_or_load(('company', company_id), load)
 
-@app.get('/companies/{company_id}')
-def get_company(company_id: int):
-    db = SessionLocal()
-    company = db.query(Company).filter(Company.id == company_id).first()
-    db.close()
-    if not company:
-        raise HTTPException(status_code=404, detail='Компания не найдена')
-    return {
-        'id': company.id,
-        'name': company.name,
-        'description': company.description,
-        'industry': company.industry,
-        'location': company.location,
-        'logo_url': company.logo_url,
-        'employee_count': company.employee_count,
-        'contact_email': company.contact_email,
-        'created_at': company.created_at
-    }
+@app.get('/search')
+async def search(
+    q: str,
+    kind: Literal['all', 'companies', 'posts'] = 'all',
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db),
+):
+    match = fts_match_query(q)
+    if match is None:
+        return []
+
+    results = []
+    if kind in ('all', 'companies'):
+        rows = (await db.execute(
+            text(SEARCH_COMPANIES_SQL), {'match': match, 'limit': limit}
+        )).mappings().all()
+        results += [
+            {
+                'type': 'company',
+                'id': row['id'],
+                'title': row['name'],
+                'industry': row['industry'],
+                'location': row['location'],
+                'logo_url': row['logo_url'],
+                'snippet': row['snippet'],
+                'rank': row['rank'],
+            }
+            for row in rows
+        ]
+    if kind in ('all', 'posts'):
+        rows = (await db.execute(
+            text(SEARCH_POSTS_SQL), {'match': match, 'limit': limit}
+        )).mappings().all()
+        results += [
+            {
+                'type': 'post',
+                'id': row['id'],
+                'user_id': row['user_id'],
+                'company_id': row['company_id'],
+                'created_at': row['created_at'],
+                'snippet': row['snippet'],
+                'rank': row['rank'],
+            }
+            for row in rows
+        ]
+
+    results.sort(key=lambda item: item['rank'])
+    return results[:limit]
 
 @app.post('/posts')
-def create_post(req: PostCreateRequest, user_id: int):
-    db = SessionLocal()
+async def create_post(req: PostCreateRequest, user_id: int, db: AsyncSession = Depends(get_db)):
+    seq = await bump_versions(db, 'posts')
     post = Post(
         user_id=user_id,
         company_id=req.company_id,
         content=req.content,
-        image_url=req.image_url
+        image_url=req.image_url,
+        change_seq=seq
     )
     db.add(post)
-    db.commit()
-    db.refresh(post)
-    db.close()
+    await db.commit()
     return {'message': 'Пост создан', 'post_id': post.id}
 
-@app.get('/posts')
-def get_posts():
-    db = SessionLocal()
-    posts = db.query(Post).order_by(Post.created_at.desc()).all()
-    db.close()
-    return [
-        {
+@app.put('/posts/by-hash/{content_hash}')
+async def upsert_post(content_hash: str, req: PostCreateRequest, user_id: int, db: AsyncSession = Depends(get_db)):
+    """Идемпотентная публикация: пост с тем же хэшем (company_id, content) создаётся один раз"""
+    if content_hash != post_content_hash(req.company_id, req.content):
+        raise HTTPException(status_code=400, detail='content_hash не совпадает с содержимым поста')
+    seq = await bump_versions(db, 'posts')
+    written, existing = await upsert_by_key(db, Post, 'content_hash', [{
+        'user_id': user_id,
+        'company_id': req.company_id,
+        'content': req.content,
+        'image_url': req.image_url,
+        'content_hash': content_hash,
+        'likes_count': 0,
+        'comments_count': 0,
+        'change_seq': seq,
+    }], POST_UPSERT_COLUMNS)
+    if not written:
+        await db.rollback()
+        return {'message': 'Пост не изменился', 'post_id': next(iter(existing.values()))}
+    await db.commit()
+    return {'message': 'Пост сохранён', 'post_id': next(iter(written.values()))}
+
+async def liked_post_ids(db: AsyncSession, viewer_id: Optional[int], post_ids) -> set:
+    """Какие из постов страницы лайкнул зритель — один запрос IN (...) на всю страницу"""
+    if viewer_id is None or not post_ids:
+        return set()
+    rows = await db.execute(
+        select(Like.post_id).where(Like.user_id == viewer_id, Like.post_id.in_(post_ids))
+    )
+    # Плюс лайки, которые ещё ждут записи в буфере
+    return set(rows.scalars()) | like_buffer.liked_by(viewer_id, post_ids)
+
+POST_EXPANSIONS = {'author', 'company', 'comments'}
+COMMENT_PREVIEW_SIZE = 2
+
+def parse_expand(expand: Optional[str]) -> set:
+    fields = {field.strip() for field in (expand or '').split(',') if field.strip()}
+    unknown = fields - POST_EXPANSIONS
+    if unknown:
+        raise HTTPException(status_code=400, detail=f'Неизвестные поля expand: {", ".join(sorted(unknown))}')
+    return fields
+
+def author_summary(user: Optional[User]):
+    if user is None:
+        return None
+    return {
+        'id': user.id,
+        'name': user.name,
+        'position': user.position,
+        'company_name': user.company_name,
+        'avatar_url': user.avatar_url
+    }
+
+def company_summary(company: Optional[Company]):
+    if company is None:
+        return None
+    return {
+        'id': company.id,
+        'name': company.name,
+        'industry': company.industry,
+        'location': company.location,
+        'logo_url': company.logo_url
+    }
+
+def comment_to_dict(comment: Comment):
+    return {
+        'id': comment.id,
+        'post_id': comment.post_id,
+        'user_id': comment.user_id,
+        'content': comment.content,
+        'created_at': comment.created_at
+    }
+
+async def latest_comments(db: AsyncSession, post_ids, per_post: int) -> dict:
+    """Последние per_post комментариев к каждому посту страницы — одним оконным запросом"""
+    if not post_ids:
+        return {}
+    ranked = (
+        select(
+            Comment.id,
+            func.row_number().over(
+                partition_by=Comment.post_id,
+                order_by=(Comment.created_at.desc(), Comment.id.desc()),
+            ).label('rn'),
+        )
+        .where(Comment.post_id.in_(post_ids))
+        .subquery()
+    )
+    rows = await db.execute(
+        select(Comment)
+        .join(ranked, Comment.id == ranked.c.id)
+        .where(ranked.c.rn <= per_post)
+        .order_by(Comment.post_id, ranked.c.rn)
+    )
+    previews = {}
+    for comment in rows.scalars():
+        previews.setdefault(comment.post_id, []).append(comment_to_dict(comment))
+    return previews
+
+@app.get('/posts', response_model=PostPage, response_model_exclude_unset=True)
+async def get_posts(
+    request: Request,
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    viewer_id: Optional[int] = None,
+    expand: Optional[str] = Query(None, description='author,company,comments — вложить автора, компанию и последние комментарии'),
+    db: AsyncSession = Depends(get_db),
+):
+    expand_fields = parse_expand(expand)
+    versioned = ['posts']
+    if 'author' in expand_fields:
+        versioned.append('users')
+    if 'company' in expand_fields:
+        versioned.append('companies')
+    not_modified = await check_not_modified(request, response, db, versioned, like_buffer.etag_component())
+    if not_modified:
+        return not_modified
+
+    query = select(Post)
+    # Автор и компания — связи many-to-one, поэтому LEFT JOIN в том же запросе:
+    # страница ленты целиком приходит одним SQL-запросом без N+1
+    if 'author' in expand_fields:
+        query = query.options(joinedload(Post.user))
+    if 'company' in expand_fields:
+        query = query.options(joinedload(Post.company))
+    if cursor:
+        # Keyset-пагинация: продолжаем строго после последнего поста предыдущей страницы
+        created_at, post_id = decode_datetime_cursor(cursor)
+        query = query.where(tuple_(Post.created_at, Post.id) < tuple_(created_at, post_id))
+    # Берём на одну запись больше, чтобы понять, есть ли следующая страница
+    query = query.order_by(Post.created_at.desc(), Post.id.desc()).limit(limit + 1)
+    posts = (await db.execute(query)).scalars().all()
+
+    next_cursor = None
+    if len(posts) > limit:
+        posts = posts[:limit]
+        next_cursor = encode_cursor(posts[-1].created_at, posts[-1].id)
+    liked = await liked_post_ids(db, viewer_id, [post.id for post in posts])
+    pending_likes = like_buffer.pending_counts([post.id for post in posts])
+    previews = {}
+    if 'comments' in expand_fields:
+        previews = await latest_comments(db, [post.id for post in posts], COMMENT_PREVIEW_SIZE)
+
+    items = []
+    for post in posts:
+        item = {
             'id': post.id,
             'user_id': post.user_id,
             'company_id': post.company_id,
             'content': post.content,
             'image_url': post.image_url,
-            'likes_count': post.likes_count,
+            'likes_count': (post.likes_count or 0) + pending_likes.get(post.id, 0),
             'comments_count': post.comments_count,
+            'liked_by_me': post.id in liked,
             'created_at': post.created_at
         }
-        for post in posts
-    ]
+        if 'author' in expand_fields:
+            item['author'] = author_summary(post.user)
+        if 'company' in expand_fields:
+            item['company'] = company_summary(post.company)
+        if 'comments' in expand_fields:
+            item['latest_comments'] = previews.get(post.id, [])
+        items.append(item)
+
+    return {'items': items, 'next_cursor': next_cursor}
 
 @app.post('/posts/{post_id}/comments')
-def create_comment(post_id: int, req: CommentCreateRequest, user_id: int):
-    db = SessionLocal()
+async def create_comment(post_id: int, req: CommentCreateRequest, user_id: int, db: AsyncSession = Depends(get_db)):
     comment = Comment(
         post_id=post_id,
         user_id=user_id,
         content=req.content
     )
     db.add(comment)
-    
-    # Обновляем счетчик комментариев
-    post = db.query(Post).filter(Post.id == post_id).first()
-    if post:
-        post.comments_count += 1
-    
-    db.commit()
-    db.close()
+
+    # Обновляем счетчик комментариев атомарно, без чтения поста
+    seq = await bump_versions(db, 'posts')
+    await db.execute(
+        update(Post)
+        .where(Post.id == post_id)
+        .values(comments_count=func.coalesce(Post.comments_count, 0) + 1, change_seq=seq)
+    )
+
+    await db.commit()
     return {'message': 'Комментарий добавлен'}
 
-@app.get('/posts/{post_id}/comments')
-def get_comments(post_id: int):
-    db = SessionLocal()
-    comments = db.query(Comment).filter(Comment.post_id == post_id).order_by(Comment.created_at.desc()).all()
-    db.close()
-    return [
-        {
-            'id': comment.id,
-            'post_id': comment.post_id,
-            'user_id': comment.user_id,
-            'content': comment.content,
-            'created_at': comment.created_at
-        }
-        for comment in comments
-    ]
+@app.get('/posts/{post_id}/comments', response_model=CommentPage)
+async def get_comments(
+    post_id: int,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+):
+    query = select(Comment).where(Comment.post_id == post_id)
+    if cursor:
+        created_at, comment_id = decode_datetime_cursor(cursor)
+        query = query.where(tuple_(Comment.created_at, Comment.id) < tuple_(created_at, comment_id))
+    query = query.order_by(Comment.created_at.desc(), Comment.id.desc()).limit(limit + 1)
+    comments = (await db.execute(query)).scalars().all()
+
+    next_cursor = None
+    if len(comments) > limit:
+        comments = comments[:limit]
+        next_cursor = encode_cursor(comments[-1].created_at, comments[-1].id)
+
+    return {
+        'items': [comment_to_dict(comment) for comment in comments],
+        'next_cursor': next_cursor,
+    }
 
 @app.post('/posts/{post_id}/like')
-def like_post(post_id: int, user_id: int):
-    db = SessionLocal()
-    
-    # Проверяем, не лайкал ли уже пользователь этот пост
-    existing_like = db.query(Like).filter(
-        Like.post_id == post_id, 
-        Like.user_id == user_id
-    ).first()
-    
-    if existing_like:
+async def like_post(post_id: int, user_id: int, db: AsyncSession = Depends(get_db)):
+    if LIKE_BUFFER_ENABLED and not like_buffer.is_full():
+        # Проверяем только чтением: пост существует и ещё не лайкнут,
+        # сама запись уйдёт в базу со следующей пачкой буфера
+        row = (await db.execute(
+            select(
+                Post.id,
+                select(Like.id).where(Like.post_id == post_id, Like.user_id == user_id).exists(),
+            ).where(Post.id == post_id)
+        )).first()
+        if row is None:
+            raise HTTPException(status_code=404, detail='Пост не найден')
+        if row[1] or not like_buffer.add(post_id, user_id):
+            raise HTTPException(status_code=400, detail='Пост уже лайкнут')
+        return {'message': 'Пост лайкнут'}
+    if LIKE_BUFFER_ENABLED:
+        # Очередь переполнена (сбросы не успевают или база недоступна) — пишем сразу
+        if like_buffer.is_pending(post_id, user_id):
+            raise HTTPException(status_code=400, detail='Пост уже лайкнут')
+        like_buffer.bypassed += 1
+
+    # Уникальный индекс (post_id, user_id) вместо проверки перед вставкой:
+    # повторный лайк ничего не вставит, и это видно по rowcount
+    result = await db.execute(
+        dialect_insert(Like)
+        .values(post_id=post_id, user_id=user_id, created_at=datetime.utcnow())
+        .on_conflict_do_nothing(index_elements=['post_id', 'user_id'])
+    )
+    if not result.rowcount:
+        await db.rollback()
         raise HTTPException(status_code=400, detail='Пост уже лайкнут')
-    
-    like = Like(post_id=post_id, user_id=user_id)
-    db.add(like)
-    
-    # Обновляем счетчик лайков
-    post = db.query(Post).filter(Post.id == post_id).first()
-    if post:
-        post.likes_count += 1
-    
-    db.commit()
-    db.close()
+
+    # Обновляем счетчик лайков одним UPDATE, без read-modify-write
+    seq = await bump_versions(db, 'posts')
+    await db.execute(
+        update(Post)
+        .where(Post.id == post_id)
+        .values(likes_count=func.coalesce(Post.likes_count, 0) + 1, change_seq=seq)
+    )
+
+    await db.commit()
     return {'message': 'Пост лайкнут'}
 
+@app.delete('/posts/{post_id}/like')
+async def unlike_post(post_id: int, user_id: int, db: AsyncSession = Depends(get_db)):
+    if await like_buffer.discard(post_id, user_id):
+        return {'message': 'Лайк снят'}
+
+    result = await db.execute(delete(Like).where(Like.post_id == post_id, Like.user_id == user_id))
+    if not result.rowcount:
+        await db.rollback()
+        raise HTTPException(status_code=404, detail='Лайк не найден')
+
+    seq = await bump_versions(db, 'posts')
+    await db.execute(
+        update(Post)
+        .where(Post.id == post_id, Post.likes_count > 0)
+        .values(likes_count=Post.likes_count - 1, change_seq=seq)
+    )
+
+    await db.commit()
+    return {'message': 'Лайк снят'}
+
 @app.post('/business-cards')
-def create_business_card(req: BusinessCardCreateRequest, user_id: int):
-    db = SessionLocal()
+async def create_business_card(req: BusinessCardCreateRequest, user_id: int, db: AsyncSession = Depends(get_db)):
+    seq = await bump_versions(db, 'business_cards')
     business_card = BusinessCard(
         user_id=user_id,
         name=req.name,
@@ -469,21 +1936,20 @@ def create_business_card(req: BusinessCardCreateRequest, user_id: int):
         phone=req.phone or '',
         email=req.email,
         social_media_link=req.social_media_link or None,
-        qr_code_data=f"https://cofound.app/users/{user_id}"
+        qr_code_data=f"https://cofound.app/users/{user_id}",
+        change_seq=seq
     )
     db.add(business_card)
-    db.commit()
-    db.refresh(business_card)
-    db.close()
+    await db.commit()
+    response_cache.invalidate('business_cards', user_id)
     return {'message': 'Визитка создана', 'card_id': business_card.id}
 
 @app.put('/business-cards/{card_id}')
-def update_business_card(card_id: int, req: BusinessCardUpdateRequest):
-    db = SessionLocal()
-    card = db.query(BusinessCard).filter(BusinessCard.id == card_id).first()
+async def update_business_card(card_id: int, req: BusinessCardUpdateRequest, db: AsyncSession = Depends(get_db)):
+    card = await db.get(BusinessCard, card_id)
     if not card:
-        db.close()
         raise HTTPException(status_code=404, detail='Визитка не найдена')
+    card.change_seq = await bump_versions(db, 'business_cards')
 
     if req.name is not None:
         card.name = req.name
@@ -498,43 +1964,41 @@ def update_business_card(card_id: int, req: BusinessCardUpdateRequest):
     if req.social_media_link is not None:
         card.social_media_link = req.social_media_link
 
-    db.commit()
-    db.close()
+    await db.commit()
+    response_cache.invalidate('business_cards', card.user_id)
     return {'message': 'Визитка обновлена'}
 
-@app.get('/business-cards/{user_id}')
-def get_business_cards(user_id: int):
-    db = SessionLocal()
-    cards = db.query(BusinessCard).filter(BusinessCard.user_id == user_id).all()
-    db.close()
-    return [
-        {
-            'id': card.id,
-            'name': card.name,
-            'position': card.position,
-            'company_name': card.company_name,
-            'phone': card.phone,
-            'email': card.email,
-            'social_media_link': card.social_media_link,
-            'qr_code_data': card.qr_code_data,
-            'created_at': card.created_at
-        }
-        for card in cards
-    ]
+@app.get('/business-cards/{user_id}', response_model=List[BusinessCardOut])
+async def get_business_cards(user_id: int, db: AsyncSession = Depends(get_db)):
+    async def load():
+        cards = (await db.execute(select(BusinessCard).where(BusinessCard.user_id == user_id))).scalars().all()
+        return [
+            {
+                'id': card.id,
+                'name': card.name,
+                'position': card.position,
+                'company_name': card.company_name,
+                'phone': card.phone,
+                'email': card.email,
+                'social_media_link': card.social_media_link,
+                'qr_code_data': card.qr_code_data,
+                'created_at': card.created_at
+            }
+            for card in cards
+        ]
+    return await response_cache.get_or_load(('business_cards', user_id), load)
 
 @app.post('/subscriptions')
-def create_subscription(req: SubscriptionCreateRequest, user_id: int):
-    db = SessionLocal()
-    
+async def create_subscription(req: SubscriptionCreateRequest, user_id: int, db: AsyncSession = Depends(get_db)):
     # Отменяем активную подписку
-    active_subscription = db.query(Subscription).filter(
+    active_subscription = (await db.execute(select(Subscription).where(
         Subscription.user_id == user_id,
         Subscription.status == 'active'
-    ).first()
-    
+    ))).scalars().first()
+
     if active_subscription:
         active_subscription.status = 'cancelled'
-    
+
     # Создаем новую подписку
     from datetime import timedelta
     subscription = Subscription(
@@ -545,48 +2009,44 @@ def create_subscription(req: SubscriptionCreateRequest, user_id: int):
         status='active'
     )
     db.add(subscription)
-    db.commit()
-    db.refresh(subscription)
-    db.close()
+    await db.commit()
     return {'message': 'Подписка создана', 'subscription_id': subscription.id}
 
 # ==================== ИЗБРАННЫЕ ВИЗИТКИ ====================
 
 @app.post('/favorites')
-def add_favorite(req: FavoriteCreateRequest, user_id: int):
-    db = SessionLocal()
+async def add_favorite(req: FavoriteCreateRequest, user_id: int, db: AsyncSession = Depends(get_db)):
     # проверка существования визитки
-    card = db.query(BusinessCard).filter(BusinessCard.id == req.business_card_id).first()
+    card = await db.get(BusinessCard, req.business_card_id)
     if not card:
-        db.close()
         raise HTTPException(status_code=404, detail='Визитка не найдена')
 
     # не добавлять дубликаты
-    exists = db.query(FavoriteCard).filter(
+    exists = await db.execute(select(FavoriteCard.id).where(
         FavoriteCard.user_id == user_id,
         FavoriteCard.business_card_id == req.business_card_id
-    ).first()
-    if exists:
-        db.close()
+    ))
+    if exists.first():
         return {'message': 'Уже в избранном'}
 
-    favorite = FavoriteCard(user_id=user_id, business_card_id=req.business_card_id)
+    seq = await bump_versions(db, 'favorites')
+    favorite = FavoriteCard(user_id=user_id, business_card_id=req.business_card_id, change_seq=seq)
     db.add(favorite)
-    db.commit()
-    db.refresh(favorite)
-    db.close()
+    await db.commit()
     return {'message': 'Добавлено в избранное', 'favorite_id': favorite.id}
 
-@app.get('/favorites/{user_id}')
-def get_favorites(user_id: int):
-    db = SessionLocal()
-    favorites = db.query(FavoriteCard).filter(FavoriteCard.user_id == user_id).all()
-    # получить карточки
-    card_ids = [f.business_card_id for f in favorites]
-    cards = []
-    if card_ids:
-        cards = db.query(BusinessCard).filter(BusinessCard.id.in_(card_ids)).all()
-    db.close()
+@app.get('/favorites/{user_id}', response_model=List[BusinessCardOut])
+async def get_favorites(user_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_db)):
+    not_modified = await check_not_modified(request, response, db, ['favorites', 'business_cards'])
+    if not_modified:
+        return not_modified
+
+    # визитки из избранного одним запросом
+    cards = (await db.execute(
+        select(BusinessCard).where(BusinessCard.id.in_(
+            select(FavoriteCard.business_card_id).where(FavoriteCard.user_id == user_id)
+        ))
+    )).scalars().all()
     return [
         {
             'id': c.id,
@@ -604,14 +2064,15 @@ def get_favorites(user_id: int):
     ]
 
 @app.delete('/favorites')
-def remove_favorite(user_id: int, business_card_id: int):
-    db = SessionLocal()
-    deleted = db.query(FavoriteCard).filter(
+async def remove_favorite(user_id: int, business_card_id: int, db: AsyncSession = Depends(get_db)):
+    deleted = (await db.execute(delete(FavoriteCard).where(
         FavoriteCard.user_id == user_id,
         FavoriteCard.business_card_id == business_card_id
-    ).delete()
-    db.commit()
-    db.close()
+    ).returning(FavoriteCard.id, FavoriteCard.user_id))).all()
+    if deleted:
+        seq = await bump_versions(db, 'favorites')
+        await record_tombstones(db, 'favorites', deleted, seq)
+    await db.commit()
     if deleted:
         return {'message': 'Удалено из избранного'}
     raise HTTPException(status_code=404, detail='Избранное не найдено')
@@ -619,37 +2080,35 @@ def remove_favorite(user_id: int, business_card_id: int):
 # ==================== ИЗБРАННЫЕ КОМПАНИИ ====================
 
 @app.post('/company-favorites')
-def add_company_favorite(req: FavoriteCompanyCreateRequest, user_id: int):
-    db = SessionLocal()
-    company = db.query(Company).filter(Company.id == req.company_id).first()
+async def add_company_favorite(req: FavoriteCompanyCreateRequest, user_id: int, db: AsyncSession = Depends(get_db)):
+    company = await db.get(Company, req.company_id)
     if not company:
-        db.close()
         raise HTTPException(status_code=404, detail='Компания не найдена')
 
-    exists = db.query(FavoriteCompany).filter(
+    exists = await db.execute(select(FavoriteCompany.id).where(
         FavoriteCompany.user_id == user_id,
         FavoriteCompany.company_id == req.company_id
-    ).first()
-    if exists:
-        db.close()
+    ))
+    if exists.first():
         return {'message': 'Уже в избранном'}
 
-    favorite = FavoriteCompany(user_id=user_id, company_id=req.company_id)
+    seq = await bump_versions(db, 'company_favorites')
+    favorite = FavoriteCompany(user_id=user_id, company_id=req.company_id, change_seq=seq)
     db.add(favorite)
-    db.commit()
-    db.refresh(favorite)
-    db.close()
+    await db.commit()
     return {'message': 'Добавлено в избранное', 'favorite_id': favorite.id}
 
-@app.get('/company-favorites/{user_id}')
-def get_company_favorites(user_id: int):
-    db = SessionLocal()
-    favorites = db.query(FavoriteCompany).filter(FavoriteCompany.user_id == user_id).all()
-    company_ids = [f.company_id for f in favorites]
-    companies = []
-    if company_ids:
-        companies = db.query(Company).filter(Company.id.in_(company_ids)).all()
-    db.close()
+@app.get('/company-favorites/{user_id}', response_model=List[CompanyOut])
+async def get_company_favorites(user_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_db)):
+    not_modified = await check_not_modified(request, response, db, ['company_favorites', 'companies'])
+    if not_modified:
+        return not_modified
+
+    companies = (await db.execute(
+        select(Company).where(Company.id.in_(
+            select(FavoriteCompany.company_id).where(FavoriteCompany.user_id == user_id)
+        ))
+    )).scalars().all()
     return [
         {
             'id': company.id,
@@ -666,48 +2125,432 @@ def get_company_favorites(user_id: int):
     ]
 
 @app.delete('/company-favorites')
-def remove_company_favorite(user_id: int, company_id: int):
-    db = SessionLocal()
-    deleted = db.query(FavoriteCompany).filter(
+async def remove_company_favorite(user_id: int, company_id: int, db: AsyncSession = Depends(get_db)):
+    deleted = (await db.execute(delete(FavoriteCompany).where(
         FavoriteCompany.user_id == user_id,
         FavoriteCompany.company_id == company_id
-    ).delete()
-    db.commit()
-    db.close()
+    ).returning(FavoriteCompany.id, FavoriteCompany.user_id))).all()
+    if deleted:
+        seq = await bump_versions(db, 'company_favorites')
+        await record_tombstones(db, 'company_favorites', deleted, seq)
+    await db.commit()
     if deleted:
         return {'message': 'Удалено из избранного'}
     raise HTTPException(status_code=404, detail='Избранное не найдено')
 
+# ==================== ДЕЛЬТА-СИНХРОНИЗАЦИЯ ====================
+
+# Клиент хранит токен последней синхронизации и забирает только строки,
+# изменённые после него (change_seq > since), плюс надгробия удалённых строк.
+# Избранное и визитки — личные коллекции: отдаются только строки user_id.
+SYNC_PAGE_SIZE = 500
+MAX_SYNC_PAGE_SIZE = 5000
+
+def _sync_company(company: Company):
+    return {
+        'id': company.id,
+        'name': company.name,
+        'description': company.description,
+        'industry': company.industry,
+        'location': company.location,
+        'logo_url': company.logo_url,
+        'employee_count': company.employee_count,
+        'contact_email': company.contact_email,
+        'created_by': company.created_by,
+        'created_at': company.created_at,
+        'updated_at': company.updated_at
+    }
+
+def _sync_post(post: Post):
+    return {
+        'id': post.id,
+        'user_id': post.user_id,
+        'company_id': post.company_id,
+        'content': post.content,
+        'image_url': post.image_url,
+        'likes_count': post.likes_count,
+        'comments_count': post.comments_count,
+        'created_at': post.created_at,
+        'updated_at': post.updated_at
+    }
+
+def _sync_business_card(card: BusinessCard):
+    return {
+        'id': card.id,
+        'user_id': card.user_id,
+        'name': card.name,
+        'position': card.position,
+        'company_name': card.company_name,
+        'phone': card.phone,
+        'email': card.email,
+        'social_media_link': card.social_media_link,
+        'qr_code_data': card.qr_code_data,
+        'created_at': card.created_at,
+        'updated_at': card.updated_at
+    }
+
+def _sync_favorite(favorite: FavoriteCard):
+    return {
+        'id': favorite.id,
+        'user_id': favorite.user_id,
+        'business_card_id': favorite.business_card_id,
+        'created_at': favorite.created_at
+    }
+
+def _sync_company_favorite(favorite: FavoriteCompany):
+    return {
+        'id': favorite.id,
+        'user_id': favorite.user_id,
+        'company_id': favorite.company_id,
+        'created_at': favorite.created_at
+    }
+
+# коллекция -> (модель, личная ли коллекция, сериализация)
+SYNC_COLLECTIONS = {
+    'posts': (Post, False, _sync_post),
+    'companies': (Company, False, _sync_company),
+    'business_cards': (BusinessCard, True, _sync_business_card),
+    'favorites': (FavoriteCard, True, _sync_favorite),
+    'company_favorites': (FavoriteCompany, True, _sync_company_favorite),
+}
+
+async def record_tombstones(db: AsyncSession, collection: str, rows, seq: int):
+    """rows — пары (row_id, user_id) удалённых строк"""
+    if not rows:
+        return
+    now = datetime.utcnow()
+    await db.execute(insert(Tombstone), [
+        {'collection': collection, 'row_id': row_id, 'user_id': user_id, 'change_seq': seq, 'deleted_at': now}
+        for row_id, user_id in rows
+    ])
+
+async def tombstone_all(db: AsyncSession, collection: str, seq: int):
+    """Надгробия для всех строк коллекции одним INSERT ... SELECT (перед массовым удалением)"""
+    model, personal, _ = SYNC_COLLECTIONS[collection]
+    await db.execute(insert(Tombstone).from_select(
+        ['collection', 'row_id', 'user_id', 'change_seq', 'deleted_at'],
+        select(
+            literal(collection),
+            model.id,
+            model.user_id if personal else null(),
+            literal(seq),
+            literal(datetime.utcnow()),
+        ),
+    ))
+
+def _sync_scope(query, model, personal: bool, user_id: int):
+    return query.where(model.user_id == user_id) if personal else query
+
+@app.get('/sync', response_model=SyncResponse)
+async def sync(
+    user_id: int,
+    since: Optional[str] = None,
+    limit: int = Query(SYNC_PAGE_SIZE, ge=1, le=MAX_SYNC_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db),
+):
+    since_seq = -1
+    if since:
+        try:
+            (since_seq,) = decode_cursor(since)
+            since_seq = int(since_seq)
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail='Некорректный токен синхронизации')
+
+    current = (await db.execute(
+        select(DataVersion.version).where(DataVersion.name == CHANGE_SEQ)
+    )).scalar() or 0
+
+    async def fetch(upper: int, page_limit: Optional[int]):
+        """Изменения в диапазоне (since_seq, upper] по каждой коллекции, по возрастанию change_seq"""
+        upserts, deletes = {}, {}
+        for name, (model, personal, _) in SYNC_COLLECTIONS.items():
+            query = _sync_scope(
+                select(model).where(model.change_seq > since_seq, model.change_seq <= upper),
+                model, personal, user_id,
+            ).order_by(model.change_seq, model.id)
+            if page_limit is not None:
+                query = query.limit(page_limit + 1)
+            upserts[name] = (await db.execute(query)).scalars().all()
+        if since:
+            # Первая синхронизация — полный снимок, удалённое ей не нужно
+            query = select(Tombstone).where(
+                Tombstone.change_seq > since_seq,
+                Tombstone.change_seq <= upper,
+                (Tombstone.user_id == user_id) | Tombstone.user_id.is_(None),
+            ).order_by(Tombstone.change_seq, Tombstone.id)
+            if page_limit is not None:
+                query = query.limit(page_limit + 1)
+            deletes = (await db.execute(query)).scalars().all()
+        return upserts, deletes
+
+    upserts, deletes = await fetch(current, limit)
+
+    # Страница заканчивается на границе изменения: всё, что до неё, отдаём целиком
+    first_excess = [rows[limit].change_seq for rows in (*upserts.values(), deletes) if len(rows) > limit]
+    upper = current
+    if first_excess:
+        upper = min(first_excess) - 1
+        if upper <= since_seq:
+            # Одно изменение (пачка) больше limit строк — отдаём его без ограничения
+            upper = min(first_excess)
+            upserts, deletes = await fetch(upper, None)
+
+    changes = {}
+    for name, (model, personal, to_dict) in SYNC_COLLECTIONS.items():
+        # По id оставляем последнее событие: вставку после удаления или удаление после вставки
+        events = {}
+        for row in upserts[name]:
+            if row.change_seq <= upper:
+                events[row.id] = (row.change_seq, row)
+        for tombstone in deletes:
+            if tombstone.collection == name and tombstone.change_seq <= upper:
+                if tombstone.change_seq >= events.get(tombstone.row_id, (-1, None))[0]:
+                    events[tombstone.row_id] = (tombstone.change_seq, None)
+        changes[name] = {
+            'upserted': [to_dict(row) for _, row in events.values() if row is not None],
+            'deleted': [row_id for row_id, (_, row) in events.items() if row is None],
+        }
+
+    return {
+        'changes': changes,
+        'next_since': encode_cursor(upper),
+        'has_more': upper < current,
+    }
+
+# ==================== ПАКЕТНАЯ ЗАПИСЬ ====================
+
+# Сидеры и импорт партнёров создают сотни записей подряд. Вместо запроса
+# и транзакции на каждую запись — один POST /batch/{collection}: элементы
+# проверяются за один проход, корректные вставляются одним executemany
+# в одной транзакции, ответ содержит id или ошибку для каждого элемента.
+BATCH_MAX_ITEMS = int(os.environ.get('BATCH_MAX_ITEMS', '1000'))
+
+BATCH_ITEM_ADAPTERS = {
+    'posts': TypeAdapter(BatchPostItem),
+    'companies': TypeAdapter(BatchCompanyItem),
+    'comments': TypeAdapter(BatchCommentItem),
+}
+
+def _validation_message(exc: ValidationError) -> str:
+    return '; '.join(
+        f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in exc.errors()
+    )
+
+async def _existing_ids(db: AsyncSession, model, ids) -> set:
+    ids = {value for value in ids if value is not None}
+    if not ids:
+        return set()
+    return set((await db.execute(select(model.id).where(model.id.in_(ids)))).scalars())
+
+@app.post('/batch/{collection}')
+async def batch_create(
+    collection: Literal['posts', 'companies', 'comments'],
+    req: BatchRequest,
+    user_id: int,
+    upsert: bool = Query(False, description='posts и companies: обновлять существующие записи по естественному ключу'),
+    db: AsyncSession = Depends(get_db),
+):
+    if len(req.items) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f'Не больше {BATCH_MAX_ITEMS} элементов за запрос')
+    if upsert and collection == 'comments':
+        raise HTTPException(status_code=400, detail='upsert поддерживается только для posts и companies')
+
+    adapter = BATCH_ITEM_ADAPTERS[collection]
+    errors = {}
+    valid = []  # (индекс во входном массиве, элемент)
+    for index, raw in enumerate(req.items):
+        try:
+            valid.append((index, adapter.validate_python(raw)))
+        except ValidationError as exc:
+            errors[index] = _validation_message(exc)
+
+    # Ссылки проверяем одним запросом на весь пакет, а не на каждый элемент
+    if collection == 'posts':
+        companies = await _existing_ids(db, Company, (item.company_id for _, item in valid))
+        for index, item in valid:
+            if item.company_id is not None and item.company_id not in companies:
+                errors[index] = 'Компания не найдена'
+    elif collection == 'comments':
+        posts = await _existing_ids(db, Post, (item.post_id for _, item in valid))
+        for index, item in valid:
+            if item.post_id not in posts:
+                errors[index] = 'Пост не найден'
+    valid = [(index, item) for index, item in valid if index not in errors]
+
+    ids = {}
+    if valid:
+        seq = await bump_versions(db, 'posts' if collection == 'comments' else collection)
+        if collection == 'posts':
+            model = Post
+            rows = [
+                {
+                    'user_id': item.user_id or user_id,
+                    'company_id': item.company_id,
+                    'content': item.content,
+                    'image_url': item.image_url,
+                    'likes_count': 0,
+                    'comments_count': 0,
+                    'change_seq': seq,
+                }
+                for _, item in valid
+            ]
+            if upsert:
+                for row in rows:
+                    row['content_hash'] = post_content_hash(row['company_id'], row['content'])
+        elif collection == 'companies':
+            model = Company
+            rows = [company_row(item, item.user_id or user_id, seq) for _, item in valid]
+        else:
+            model = Comment
+            rows = [
+                {'post_id': item.post_id, 'user_id': item.user_id or user_id, 'content': item.content}
+                for _, item in valid
+            ]
+
+        if collection == 'companies' or upsert:
+            # Компании всегда вставляются по уникальному name_key; посты — по content_hash при upsert.
+            # В таблицу уходит первая строка с каждым ключом, повторы внутри пакета получают её id
+            key, columns = ('name_key', COMPANY_UPSERT_COLUMNS) if collection == 'companies' else ('content_hash', POST_UPSERT_COLUMNS)
+            unique_rows = {}
+            for row in rows:
+                unique_rows.setdefault(row[key], row)
+            written, existing = await upsert_by_key(db, model, key, list(unique_rows.values()), columns if upsert else ())
+            claimed = set()
+            for (index, _), row in zip(valid, rows):
+                value = row[key]
+                if upsert:
+                    row_id = written.get(value) or existing.get(value)
+                else:
+                    row_id = written.get(value) if value not in claimed else None
+                claimed.add(value)
+                if row_id is not None:
+                    ids[index] = row_id
+                else:
+                    errors[index] = 'Компания с таким названием уже существует' if collection == 'companies' else 'Пост не сохранён'
+            changed = bool(written)
+        else:
+            # sort_by_parameter_order: id возвращаются в порядке строк, даже если вставка разбита на части
+            inserted = await db.execute(
+                insert(model).returning(model.id, sort_by_parameter_order=True), rows
+            )
+            ids = dict(zip((index for index, _ in valid), inserted.scalars()))
+            changed = True
+
+        if collection == 'comments':
+            per_post = {}
+            for _, item in valid:
+                per_post[item.post_id] = per_post.get(item.post_id, 0) + 1
+            await db.execute(
+                update(Post.__table__)
+                .where(Post.__table__.c.id == bindparam('post_id'))
+                .values(
+                    comments_count=func.coalesce(Post.__table__.c.comments_count, 0) + bindparam('added'),
+                    change_seq=seq,
+                ),
+                [{'post_id': post_id, 'added': added} for post_id, added in per_post.items()],
+            )
+        if changed:
+            await db.commit()
+            if collection == 'companies':
+                response_cache.invalidate('companies')
+                response_cache.invalidate('company')
+        else:
+            # Повторный импорт без изменений: версии коллекции не сдвигаем
+            await db.rollback()
+
+    return {
+        'created': len(ids),
+        'failed': len(errors),
+        'results': [
+            {'index': index, 'id': ids[index]} if index in ids else {'index': index, 'error': errors[index]}
+            for index in range(len(req.items))
+        ],
+    }
+
+# ==================== ЭКСПОРТ (NDJSON) ====================
+
+# Выгрузка таблицы целиком для аналитики: строка JSON на запись, потоком.
+# Строки читаются курсором пачками по EXPORT_BATCH_SIZE (yield_per) и сразу
+# уходят клиенту, поэтому память не зависит от размера таблицы.
+EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', '1000'))
+
+# коллекция -> (таблица, колонки, которые не выгружаются)
+EXPORT_COLLECTIONS = {
+    'users': (User.__table__, {'password_hash'}),
+    'posts': (Post.__table__, set()),
+    'companies': (Company.__table__, set()),
+    'comments': (Comment.__table__, set()),
+    'business_cards': (BusinessCard.__table__, set()),
+}
+
+async def _export_rows(collection: str, after_id: Optional[int]):
+    table, hidden = EXPORT_COLLECTIONS[collection]
+    columns = [column for column in table.columns if column.name not in hidden]
+    query = select(*columns).order_by(table.c.id)
+    if after_id is not None:
+        query = query.where(table.c.id > after_id)
+
+    # Своя сессия: соединение нужно, пока клиент дочитывает поток,
+    # и закрывается, даже если клиент оборвал загрузку
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        async for rows in result.mappings().partitions():
+            yield b''.join(to_json(dict(row)) + b'\n' for row in rows)
+
+@app.get('/export/{collection}')
+async def export_collection(
+    collection: Literal['users', 'posts', 'companies', 'comments', 'business_cards'],
+    after_id: Optional[int] = Query(None, description='продолжить выгрузку после этого id'),
+):
+    return StreamingResponse(
+        _export_rows(collection, after_id),
+        media_type='application/x-ndjson',
+        headers={'Content-Disposition': f'attachment; filename="{collection}.ndjson"'},
+    )
+
+# ==================== АДМИН: МЕТРИКИ ====================
+
+@app.get('/admin/metrics')
+async def admin_metrics():
+    return {
+        'password_hashing': password_hasher.metrics(),
+        'db_pool': pool_metrics.snapshot(engine.sync_engine.pool),
+        'response_cache': response_cache.metrics(),
+        'compressed_cache': compressed_cache.metrics(),
+        'like_buffer': like_buffer.metrics(),
+    }
+
 # ==================== АДМИН: СБРОС ДАННЫХ (DEV) ====================
 
 @app.post('/admin/reset')
-def admin_reset(req: AdminResetRequest):
-    db = SessionLocal()
-    try:
-        # Удаляем в корректном порядке зависимости
-        if req.drop_favorites:
-            db.query(FavoriteCard).delete()
-            db.query(FavoriteCompany).delete()
-        if req.drop_posts:
-            db.query(Like).delete()
-            db.query(Comment).delete()
-            db.query(Post).delete()
-        if req.drop_companies:
-            db.query(Company).delete()
-        if req.drop_cards:
-            db.query(BusinessCard).delete()
-        if req.drop_subscriptions:
-            db.query(Subscription).delete()
-        if req.drop_users:
-            db.query(User).delete()
-        db.commit()
-        return {"message": "Данные очищены"}
-    finally:
-        db.close()
-
-# Создание всех таблиц
-Base.metadata.create_all(bind=engine)
+async def admin_reset(req: AdminResetRequest, db: AsyncSession = Depends(get_db)):
+    seq = await bump_versions(db, 'users', 'companies', 'posts', 'business_cards', 'favorites', 'company_favorites')
+    # Удаляем в корректном порядке зависимости; синхронизируемые строки оставляют надгробия для /sync
+    if req.drop_favorites:
+        await tombstone_all(db, 'favorites', seq)
+        await tombstone_all(db, 'company_favorites', seq)
+        await db.execute(delete(FavoriteCard))
+        await db.execute(delete(FavoriteCompany))
+    if req.drop_posts:
+        like_buffer.clear()
+        await tombstone_all(db, 'posts', seq)
+        await db.execute(delete(Like))
+        await db.execute(delete(Comment))
+        await db.execute(delete(Post))
+    if req.drop_companies:
+        await tombstone_all(db, 'companies', seq)
+        await db.execute(delete(Company))
+    if req.drop_cards:
+        await tombstone_all(db, 'business_cards', seq)
+        await db.execute(delete(BusinessCard))
+    if req.drop_subscriptions:
+        await db.execute(delete(Subscription))
+    if req.drop_users:
+        await db.execute(delete(User))
+    await db.commit()
+    response_cache.clear()
+    return {"message": "Данные очищены"}
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
+    uvicorn.run(app, host="0.0.0.0", port=8000)
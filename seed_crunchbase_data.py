@@ -4,20 +4,38 @@ Seed server with companies and events inspired by Crunchbase trends.
 Server is treated as source of truth; script creates companies (if missing)
 and posts (events) in Russian.
 
+Скрипт идемпотентен: компании и посты отправляются пакетами /batch/*?upsert=true
+в несколько потоков, и сервер сам сводит их с существующими по естественным
+ключам (название компании, хэш company_id+content). Повторный запуск ничего
+не дублирует и не требует выгружать таблицы заранее.
+
 Usage (Windows):
-  py seed_crunchbase_data.py
+  py seed_crunchbase_data.py [--server URL] [--workers 8] [--batch-size 500]
+                             [--dry-run] [--reset]
+
+  --dry-run  сравнить с текущими данными (/export) и показать, что будет создано
+  --reset    перед загрузкой очистить компании, посты и прочие данные (кроме пользователей)
 
 Requires: requests
 """
 
-import requests
+import argparse
 import random
 import json
-from typing import Dict, List, Tuple, Optional
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Tuple, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 SERVER = "http://62.113.37.96:8000"
 # По умолчанию используем первого пользователя, но далее создадим 20 авторов
 SEED_USER_ID = 1
+# /batch принимает не больше 1000 элементов за запрос
+BATCH_SIZE = 500
+WORKERS = 8
 
 FAKE_AUTHORS: List[Dict[str, str]] = [
     {"name": "Алексей Смирнов", "email": "alexey.smirnov+seed1@example.com", "avatar": "assets/avatar_alexey.svg"},
@@ -41,72 +59,121 @@ FAKE_AUTHORS: List[Dict[str, str]] = [
     {"name": "Егор Никитин", "email": "egor.nikitin+seed19@example.com", "avatar": "assets/avatar_egor.svg"},
     {"name": "Алина Павлова", "email": "alina.pavlova+seed20@example.com", "avatar": "assets/avatar_alina.svg"},
 ]
+# ==================== HTTP ====================
 
-def _get_companies() -> List[Dict]:
-    r = requests.get(f"{SERVER}/companies", timeout=20)
-    r.raise_for_status()
-    return r.json()
-
-def _ensure_company(name: str, description: str, industry: str, location: str, logo_url: str | None,
-                    employee_count: int, contact_email: str) -> int:
-    existing = _get_companies()
-    for c in existing:
-        if c.get("name", "").strip().lower() == name.strip().lower():
-            return c["id"]
-    # create
-    r = requests.post(
-        f"{SERVER}/companies",
-        params={"user_id": SEED_USER_ID},
-        json={
-            "name": name,
-            "description": description,
-            "industry": industry,
-            "location": location,
-            "logo_url": logo_url,
-            "employee_count": employee_count,
-            "contact_email": contact_email,
-        },
-        timeout=30,
+def _make_session(workers: int) -> requests.Session:
+    # Одна сессия на весь прогон: пул keep-alive соединений на каждый поток
+    # и повторы с экспоненциальной паузой (учитывая Retry-After) при перегрузке.
+    # Повторяем только ответы, после которых запрос точно не был применён
+    # (429/502/503/504) и ошибки соединения; обрыв чтения не повторяем,
+    # чтобы не задвоить пакет — недостающее догрузит следующий запуск.
+    retry = Retry(
+        total=5,
+        connect=5,
+        read=0,
+        status=5,
+        backoff_factor=0.5,
+        status_forcelist=(429, 502, 503, 504),
+        allowed_methods=None,
+        respect_retry_after_header=True,
+        raise_on_status=False,
     )
-    r.raise_for_status()
-    return r.json()["company_id"]
-
-def _create_post(company_id: int, content_ru: str, image_url: str | None = None, author_user_id: int | None = None):
-    payload = {
-        "content": content_ru,
-        "company_id": company_id,
-        # backend ожидает строку, передаём пустую если нет изображения
-        "image_url": image_url if image_url is not None else "",
-    }
-    r = requests.post(
-        f"{SERVER}/posts",
-        params={"user_id": author_user_id if author_user_id else SEED_USER_ID},
-        json=payload,
-        timeout=30,
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def _export(session: requests.Session, collection: str) -> Iterator[Dict]:
+    # Снимок коллекции одним потоковым запросом вместо постраничного обхода
+    with session.get(f"{SERVER}/export/{collection}", stream=True, timeout=60) as r:
+        r.raise_for_status()
+        for line in r.iter_lines():
+            if line:
+                yield json.loads(line)
+
+def _chunks(items: List[Dict], size: int) -> Iterable[List[Dict]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def _post_batch(session: requests.Session, collection: str, items: List[Dict]) -> Tuple[List[Optional[int]], List[str]]:
+    # Возвращает id в порядке элементов пакета (None для отклонённых) и тексты ошибок
+    r = session.post(
+        f"{SERVER}/batch/{collection}",
+        params={"user_id": SEED_USER_ID, "upsert": "true"},
+        json={"items": items},
+        timeout=120,
     )
     if r.status_code != 200:
-        print("Не удалось создать пост:", r.text)
+        return [None] * len(items), [f"{collection}: HTTP {r.status_code} {r.text[:200]}"]
+    ids: List[Optional[int]] = [None] * len(items)
+    errors: List[str] = []
+    for result in r.json()["results"]:
+        if "id" in result:
+            ids[result["index"]] = result["id"]
+        else:
+            errors.append(f"{collection}[{result['index']}]: {result['error']}")
+    return ids, errors
 
-def _get_users() -> List[Dict]:
-    r = requests.get(f"{SERVER}/users", timeout=20)
-    if r.status_code != 200:
-        return []
-    return r.json()
+def _create_many(session: requests.Session, pool: ThreadPoolExecutor, collection: str,
+                 items: List[Dict], batch_size: int) -> Tuple[List[Optional[int]], List[str]]:
+    # Пакеты уходят параллельно (не больше --workers одновременно), порядок id сохраняется
+    ids: List[Optional[int]] = []
+    errors: List[str] = []
+    for chunk_ids, chunk_errors in pool.map(
+        lambda chunk: _post_batch(session, collection, chunk), _chunks(items, batch_size)
+    ):
+        ids.extend(chunk_ids)
+        errors.extend(chunk_errors)
+    return ids, errors
 
-def _get_posts() -> List[Dict]:
-    r = requests.get(f"{SERVER}/posts", timeout=20)
-    if r.status_code != 200:
-        return []
-    return r.json()
+# ==================== СНИМОК И ПЛАН ====================
+
+def _normalize(name: str) -> str:
+    # Как company_name_key на сервере: без регистра и лишних пробелов
+    return " ".join(name.split()).casefold()
+
+def _register_user(session: requests.Session, name: str, email: str, password: str = "seedpass123") -> Optional[int]:
+    r = session.post(
+        f"{SERVER}/register",
+        json={"email": email, "password": password, "name": name},
+        timeout=30,
+    )
+    if r.status_code == 200:
+        return r.json().get("user_id")
+    print("Не удалось создать пользователя:", email, r.text)
+    return None
+
+def _print_plan(session: requests.Session, missing_authors: Dict[str, Dict],
+                companies: Dict[str, Dict], events: List[Tuple[str, str, str]]):
+    # Для --dry-run снимаем компании и посты, чтобы показать разницу, ничего не записывая
+    company_ids = {_normalize(c["name"]): c["id"] for c in _export(session, "companies")}
+    existing_keys = {(p.get("company_id"), p.get("content")) for p in _export(session, "posts")}
+    missing_companies = [c for key, c in companies.items() if key not in company_ids]
+    missing_events = [
+        f"{company_name}: {text}"
+        for company_name, text, _ in events
+        if _normalize(company_name) in companies
+        and (company_ids.get(_normalize(company_name)), f"{company_name}: {text}") not in existing_keys
+    ]
+    print(
+        f"Авторы: {len(FAKE_AUTHORS) - len(missing_authors)} есть, {len(missing_authors)} создать; "
+        f"компании: {len(companies) - len(missing_companies)} есть, {len(missing_companies)} создать; "
+        f"посты: {len(events) - len(missing_events)} есть, {len(missing_events)} создать"
+    )
+    for c in missing_companies:
+        print("  + компания", c["name"])
+    for content in missing_events:
+        print("  + пост", content[:80])
 
 def _choose_author(user_ids: List[int]) -> int:
     if not user_ids:
         return SEED_USER_ID
     return random.choice(user_ids)
 
-def _admin_reset():
+def _admin_reset(session: requests.Session):
     # Очистка данных (по умолчанию не трогаем пользователей)
-    r = requests.post(
+    r = session.post(
         f"{SERVER}/admin/reset",
         json={
             "drop_users": False,
@@ -116,41 +183,27 @@ def _admin_reset():
             "drop_favorites": True,
             "drop_subscriptions": True,
         },
-        timeout=30,
+        timeout=60,
     )
     if r.status_code != 200:
         print("Не удалось очистить данные:", r.text)
 
-def _ensure_user(name: str, email: str, password: str = "seedpass123") -> Optional[int]:
-    # Пытаемся залогиниться, если не вышло — регистрируем
-    try:
-        r = requests.post(f"{SERVER}/login", json={"email": email, "password": password}, timeout=15)
-        if r.status_code == 200:
-            return r.json().get("user_id")
-    except Exception:
-        pass
-
-    r = requests.post(
-        f"{SERVER}/register",
-        json={"email": email, "password": password, "name": name},
-        timeout=20,
-    )
-    if r.status_code == 200:
-        return r.json().get("user_id")
-    else:
-        print("Не удалось создать пользователя:", email, r.text)
-        return None
+def _parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--server", default=SERVER)
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--reset", action="store_true")
+    return parser.parse_args()
 
 def main():
-    # 1) Очистим данные
-    _admin_reset()
-
-    # 2) Создадим 20 выдуманных авторов (или используем существующих)
-    created_user_ids: List[int] = []
-    for author in FAKE_AUTHORS:
-        user_id = _ensure_user(author["name"], author["email"])
-        if user_id:
-            created_user_ids.append(user_id)
+    global SERVER
+    args = _parse_args()
+    SERVER = args.server.rstrip("/")
+    started = time.perf_counter()
+    session = _make_session(args.workers)
+    pool = ThreadPoolExecutor(max_workers=args.workers)
 
     companies = [
         {
@@ -298,59 +351,87 @@ def main():
     except Exception:
       pass
 
-    # 3) Создаём компании и посты
-    name_to_id: Dict[str, int] = {}
-    name_to_logo: Dict[str, str | None] = {}
-    for c in companies:
-        cid = _ensure_company(
-            name=c["name"],
-            description=c["desc"],
-            industry=c["industry"],
-            location=c["location"],
-            logo_url=c["logo"],
-            employee_count=500,  # тестовое значение
-            contact_email=c["email"],
-        )
-        name_to_id[c["name"]] = cid
-        name_to_logo[c["name"]] = c["logo"]
-
-    # 4) Авторы: соберем существующих + добавленные фейковые
-    users = _get_users()
-    user_ids = [u.get("id") for u in users if isinstance(u.get("id"), int)]
-    # Приоритет — наши только что созданные авторы
-    if created_user_ids:
-        user_ids = created_user_ids
-    if not user_ids:
-        user_ids = [SEED_USER_ID]
-
-    # Идемпотентность: не создаём дубликаты постов (по паре company_id+content)
-    existing_posts = _get_posts()
-    existing_keys = set()
-    for p in existing_posts:
-        key = (p.get("company_id"), p.get("content"))
-        existing_keys.add(key)
-
-    # 5) Создаём события/посты
-    for company_name, text, image_url in events:
-        cid = name_to_id.get(company_name)
-        if not cid:
-            continue
-        content = f"{company_name}: {text}"
-        if (cid, content) in existing_keys:
-            continue
-        _create_post(
-            cid,
-            content_ru=content,
-            image_url=image_url,
-            author_user_id=_choose_author(user_ids),
-        )
+    try:
+        # 1) Пользователей немного — снимаем их целиком, чтобы не логинить каждого автора
+        if args.reset and not args.dry_run:
+            _admin_reset(session)
+        users_by_email = {_normalize(u["email"]): u["id"] for u in _export(session, "users")}
+        missing_authors = {}
+        for author in FAKE_AUTHORS:
+            email = _normalize(author["email"])
+            if email not in users_by_email:
+                missing_authors.setdefault(email, author)
+
+        # Компании и посты сервер сводит сам по естественным ключам (название компании,
+        # хэш company_id+content), поэтому в обычном запуске их не выгружаем
+        unique_companies = {}
+        for c in companies:
+            unique_companies.setdefault(_normalize(c["name"]), c)
+
+        if args.dry_run:
+            _print_plan(session, missing_authors, unique_companies, events)
+            return
+
+        # 2) Авторы: регистрируем недостающих параллельно
+        emails = list(missing_authors)
+        for email, user_id in zip(emails, pool.map(
+            lambda email: _register_user(session, missing_authors[email]["name"], email), emails
+        )):
+            if user_id:
+                users_by_email[email] = user_id
+        # Приоритет — наши выдуманные авторы
+        user_ids = [users_by_email[_normalize(a["email"])] for a in FAKE_AUTHORS if _normalize(a["email"]) in users_by_email]
+        if not user_ids:
+            user_ids = [SEED_USER_ID]
 
-    print("✅ Данные по компаниям и событиям добавлены на сервер")
+        # 3) Компании пакетами: новые создаются, изменённые обновляются, остальные не трогаются
+        errors: List[str] = []
+        company_list = list(unique_companies.values())
+        company_ids: Dict[str, int] = {}
+        saved_ids, batch_errors = _create_many(session, pool, "companies", [
+            {
+                "name": c["name"],
+                "description": c["desc"],
+                "industry": c["industry"],
+                "location": c["location"],
+                "logo_url": c["logo"],
+                "employee_count": 500,  # тестовое значение
+                "contact_email": c["email"],
+            }
+            for c in company_list
+        ], args.batch_size)
+        errors.extend(batch_errors)
+        for c, cid in zip(company_list, saved_ids):
+            if cid:
+                company_ids[_normalize(c["name"])] = cid
+
+        # 4) События/посты пакетами; посты компаний, которые не удалось сохранить, пропускаем
+        posts = [
+            {
+                "content": f"{company_name}: {text}",
+                "company_id": company_ids[_normalize(company_name)],
+                "image_url": image_url,
+                "user_id": _choose_author(user_ids),
+            }
+            for company_name, text, image_url in events
+            if _normalize(company_name) in company_ids
+        ]
+        saved_post_ids, batch_errors = _create_many(session, pool, "posts", posts, args.batch_size)
+        errors.extend(batch_errors)
+
+        for error in errors[:20]:
+            print("Ошибка:", error)
+        print(
+            f"✅ Данные по компаниям и событиям на сервере: "
+            f"компаний {len(company_ids)}, постов {sum(1 for pid in saved_post_ids if pid)}, ошибок {len(errors)} "
+            f"за {time.perf_counter() - started:.1f} с"
+        )
+    finally:
+        pool.shutdown()
+        session.close()
 
 if __name__ == "__main__":
     try:
         main()
     except Exception as e:
         print("❌ Ошибка при загрузке данных:", e)
-
-
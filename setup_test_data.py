@@ -5,7 +5,6 @@
 """
 
 import requests
-import time
 from datetime import datetime, timedelta
 
 # Конфигурация
@@ -33,64 +32,31 @@ def register_user(email, password, name, phone, position, company_name):
         print(f"Ошибка при регистрации {email}: {e}")
         return None
 
-def create_company(name, description, industry, location, logo_url, employee_count, contact_email, user_id):
-    """Создание компании на сервере"""
-    try:
-        response = requests.post(f"{SERVER_URL}/companies", json={
-            'name': name,
-            'description': description,
-            'industry': industry,
-            'location': location,
-            'logo_url': logo_url,
-            'employee_count': employee_count,
-            'contact_email': contact_email,
-        }, params={'user_id': user_id})
-        
-        if response.status_code == 200:
-            return response.json()['company_id']
-        else:
-            print(f"Ошибка создания компании {name}: {response.text}")
-            return None
-    except Exception as e:
-        print(f"Ошибка при создании компании {name}: {e}")
-        return None
+def create_batch(collection, items, user_id):
+    """Пакетное создание компаний, постов или комментариев одним запросом.
 
-def create_post(content, company_id, user_id, image_url=None):
-    """Создание поста на сервере"""
+    Возвращает список id в порядке items (None для элементов с ошибкой).
+    """
     try:
-        data = {
-            'content': content,
-            'company_id': company_id,
-        }
-        if image_url:
-            data['image_url'] = image_url
-            
-        response = requests.post(f"{SERVER_URL}/posts", json=data, params={'user_id': user_id})
-        
-        if response.status_code == 200:
-            return response.json()['post_id']
-        else:
-            print(f"Ошибка создания поста: {response.text}")
-            return None
-    except Exception as e:
-        print(f"Ошибка при создании поста: {e}")
-        return None
+        response = requests.post(
+            f"{SERVER_URL}/batch/{collection}",
+            json={'items': items},
+            params={'user_id': user_id},
+        )
 
-def create_comment(post_id, content, user_id):
-    """Создание комментария на сервере"""
-    try:
-        response = requests.post(f"{SERVER_URL}/posts/{post_id}/comments", json={
-            'content': content,
-        }, params={'user_id': user_id})
-        
         if response.status_code == 200:
-            return True
+            ids = []
+            for result in response.json()['results']:
+                if 'error' in result:
+                    print(f"Ошибка создания ({collection}, #{result['index']}): {result['error']}")
+                ids.append(result.get('id'))
+            return ids
         else:
-            print(f"Ошибка создания комментария: {response.text}")
-            return False
+            print(f"Ошибка пакетного создания {collection}: {response.text}")
+            return [None] * len(items)
     except Exception as e:
-        print(f"Ошибка при создании комментария: {e}")
-        return False
+        print(f"Ошибка при пакетном создании {collection}: {e}")
+        return [None] * len(items)
 
 def setup_test_data():
     """Основная функция для настройки тестовых данных"""
@@ -145,38 +111,38 @@ def setup_test_data():
     # Создаем компании
     print("🏢 Создаем компании...")
     
-    company1_id = create_company(
-        name='TechStart',
-        description='Инновационная финтех-компания',
-        industry='Финансы',
-        location='Москва',
-        logo_url='https://via.placeholder.com/100/4CAF50/FFFFFF?text=TS',
-        employee_count=50,
-        contact_email='info@techstart.ru',
-        user_id=user1_id
-    )
-    
-    company2_id = create_company(
-        name='GreenEco',
-        description='Экологичные решения для бизнеса',
-        industry='Экология',
-        location='Санкт-Петербург',
-        logo_url='https://via.placeholder.com/100/4CAF50/FFFFFF?text=GE',
-        employee_count=25,
-        contact_email='info@greeneco.ru',
-        user_id=user2_id
-    )
-    
-    company3_id = create_company(
-        name='EduPlatform',
-        description='Онлайн-образование для всех',
-        industry='Образование',
-        location='Казань',
-        logo_url='https://via.placeholder.com/100/2196F3/FFFFFF?text=EP',
-        employee_count=15,
-        contact_email='info@eduplatform.ru',
-        user_id=user3_id
-    )
+    company1_id, company2_id, company3_id = create_batch('companies', [
+        {
+            'name': 'TechStart',
+            'description': 'Инновационная финтех-компания',
+            'industry': 'Финансы',
+            'location': 'Москва',
+            'logo_url': 'https://via.placeholder.com/100/4CAF50/FFFFFF?text=TS',
+            'employee_count': 50,
+            'contact_email': 'info@techstart.ru',
+            'user_id': user1_id
+        },
+        {
+            'name': 'GreenEco',
+            'description': 'Экологичные решения для бизнеса',
+            'industry': 'Экология',
+            'location': 'Санкт-Петербург',
+            'logo_url': 'https://via.placeholder.com/100/4CAF50/FFFFFF?text=GE',
+            'employee_count': 25,
+            'contact_email': 'info@greeneco.ru',
+            'user_id': user2_id
+        },
+        {
+            'name': 'EduPlatform',
+            'description': 'Онлайн-образование для всех',
+            'industry': 'Образование',
+            'location': 'Казань',
+            'logo_url': 'https://via.placeholder.com/100/2196F3/FFFFFF?text=EP',
+            'employee_count': 15,
+            'contact_email': 'info@eduplatform.ru',
+            'user_id': user3_id
+        },
+    ], user_id=user1_id)
     
     if not all([company1_id, company2_id, company3_id]):
         print("❌ Не удалось создать все компании")
@@ -218,12 +184,7 @@ def setup_test_data():
         }
     ]
     
-    post_ids = []
-    for post_data in posts:
-        post_id = create_post(**post_data)
-        if post_id:
-            post_ids.append(post_id)
-            time.sleep(0.5)  # Небольшая задержка между запросами
+    post_ids = [post_id for post_id in create_batch('posts', posts, user_id=user1_id) if post_id]
     
     if not post_ids:
         print("❌ Не удалось создать посты")
@@ -240,9 +201,7 @@ def setup_test_data():
         {'post_id': post_ids[2], 'content': 'Отличная возможность для развития!', 'user_id': user2_id},
     ]
     
-    for comment_data in comments:
-        create_comment(**comment_data)
-        time.sleep(0.3)  # Небольшая задержка между запросами
+    create_batch('comments', comments, user_id=user1_id)
     
     print("✅ Тестовые данные успешно добавлены на сервер!")
     print(f"📊 Создано: 3 пользователя, 3 компании, {len(post_ids)} постов, {len(comments)} комментариев")